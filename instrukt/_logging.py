@@ -6,16 +6,12 @@ from textual._context import active_app
 # from textual.logging import TextualHandler
 
 from .console_capture import (
-    ConsoleFilter,
-    ErrorF,
-    LangchainF,
-    IndexCreationF,
+    ERROR_F,
+    FORMATTER,
+    INDEX_CREATION_F,
+    LANGCHAIN_F,
 )
 
-# def sentence_transformers_filter(record: LogRecord) -> bool:
-#     return record.name.startswith("sentence_transformers")
-
-
 class LogCaptureHandler(Handler):
     """A Logging handler for Textual apps."""
 
@@ -43,10 +39,10 @@ class LogCaptureHandler(Handler):
 
 def setup_logging():
 
-    log_capture_handler.setFormatter(ConsoleFilter.formatter)
+    log_capture_handler.setFormatter(FORMATTER)
     log_capture_handler.setLevel(logging.INFO)
 
-    filter = IndexCreationF() | LangchainF() | ErrorF()
+    filter = INDEX_CREATION_F | LANGCHAIN_F | ERROR_F
     log_capture_handler.addFilter(filter)
 
     # add Textual dev console handler
@@ -26,7 +26,7 @@ from dataclasses import dataclass, field
 from langchain.chat_models.openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 
-from ..config import APP_SETTINGS
+from ..config import APP_SETTINGS, ensure_llm_cache
 from ..tools.base import TOOL_REGISTRY
 from .base import InstruktAgent
 
@@ -44,6 +44,7 @@ def make_chat_memory() -> "BaseChatMemory":
 
 
 def make_llm() -> "BaseChatModel":
+    ensure_llm_cache()
     return ChatOpenAI(**APP_SETTINGS.openai.dict())
 
 
@@ -30,7 +30,7 @@ import sys
 from pathlib import Path
 from typing import Generator, Optional, Type
 
-from instrukt.config import APP_SETTINGS
+from instrukt.config import APP_SETTINGS, ensure_llm_cache
 
 from ..context import Context
 from ..errors import AgentError
@@ -166,6 +166,8 @@ class AgentLoader:
         except ImportError:
             pass
         agent_class = ModuleManager.verify_module(name)
+        # agents create their LLMs when loaded
+        ensure_llm_cache()
         try:
             agent = agent_class.load(ctx)
         except Exception as e:
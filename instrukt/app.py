@@ -146,12 +146,15 @@ class InstruktApp(App[None]):
         super().__init__(*args, **kwargs)
         self.cmd_handler = root_cmd
         #WIP: is this the right way to store a global context ?
+        if context_var.get() is None:
+            init_context()
         self.context = context_var.get()
         assert self.context is not None
         self.context.app = self
         self.agent_manager: AgentManager = AgentManager(self.context)
         self._ishell: InteractiveShellEmbed | None = None
         self._alock = _asyncio.Lock()
+        self._console_window: ConsoleWindow | None = None
 
         self.add_class("--console-enabled")
 
@@ -163,8 +166,18 @@ class InstruktApp(App[None]):
         # await self.agent_manager.load_agent("demo")
         self.screen.add_class("-no-agent")
 
+    @property
+    def console_window(self) -> ConsoleWindow:
+        """The console window, queried once then cached.
+
+        Raises NoMatches if the window is not mounted yet.
+        """
+        if self._console_window is None:
+            self._console_window = self.query_one(ConsoleWindow)
+        return self._console_window
+
     def notify_console_window(self, message: "AnyMessage") -> None:
-        self.query_one(ConsoleWindow).post_message(message)
+        self.console_window.post_message(message)
 
     def notify_agent_window(self, message: "AnyMessage") -> None:
         try:
@@ -236,7 +249,7 @@ class InstruktApp(App[None]):
 
     @on(CmdLog)
     async def cmd_log(self, message: CmdLog) -> None:
-        chat = self.query_one(ConsoleWindow)
+        chat = self.console_window
         self.call_after_refresh(chat.write, message.msg)
         message.stop()
 
@@ -249,7 +262,7 @@ class InstruktApp(App[None]):
         # self.notify(str(message.msg), timeout=2)
 
         try:
-            console = self.query_one(ConsoleWindow)
+            console = self.console_window
             self.call_after_refresh(console.write, " \n")
             self.call_after_refresh(console.write, message)
         except NoMatches:
@@ -313,7 +326,19 @@ class InstruktApp(App[None]):
         yield Footer()
 
     @on(events.Ready)
-    async def notify_windows(self, event: events.Ready) -> None:
+    async def _startup(self, event: events.Ready) -> None:
+        """Run the startup tasks once the first screen is laid out."""
+        self._warm_widget_cache()
+        self.notify_windows()
+
+    def _warm_widget_cache(self) -> None:
+        """Resolve the widgets used on the message hot paths."""
+        try:
+            self._console_window = self.query_one(ConsoleWindow)
+        except NoMatches:
+            pass
+
+    def notify_windows(self) -> None:
         """Notify all windows that the app is ready"""
         for w in self.query(".window"):
             w.post_message(self.Ready())
@@ -507,5 +532,3 @@ def run():
 
 if __name__ == "__main__":
     run()
-
-init_context()
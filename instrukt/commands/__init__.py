@@ -37,14 +37,18 @@ from .command import (
     Context,
 )
 
-"""register command modules here"""
-CMD_MODULES = [
-        'help',
-        'ui',
-        'agents',
-        'config',
-        'index',
-        ]
+"""register command modules here
+
+Each module is listed with the root commands it defines. Modules are only
+imported the first time one of their commands is looked up.
+"""
+CMD_MODULES = {
+        'help': ('help', 'man'),
+        'ui': ('clear', 'quit'),
+        'agents': ('clearmem', 'agent'),
+        'config': ('config',),
+        'index': ('index',),
+        }
 
 
 __all__ = [
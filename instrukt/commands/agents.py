@@ -65,12 +65,10 @@ class Agent(CmdGroup):
     @staticmethod
     async def cmd_list(ctx: Context) -> CallbackOutput:
         """Lists loadable agents."""
-        agents = list(ModuleManager.list_modules())
-        _agents = """\nAvailable Agents:\n"""
-        for a in agents:
-            _agents += (f"- {a}\n")
-        _agents += "---"
-        return Markdown(_agents)
+        _agents = ["\nAvailable Agents:\n"]
+        _agents.extend(f"- {a}\n" for a in ModuleManager.list_modules())
+        _agents.append("---")
+        return Markdown("".join(_agents))
 
     @staticmethod
     async def cmd_list_active(ctx: Context) -> CallbackOutput:
@@ -27,6 +27,7 @@ Implements the main command classes that are used to register and execute comman
 
 import inspect
 from functools import wraps
+from types import FunctionType
 from typing import (
     Any,
     Awaitable,
@@ -39,6 +40,7 @@ from typing import (
     Type,
     TypeVar,
     Union,
+    ValuesView,
 )
 
 from rich.console import RenderableType
@@ -72,6 +74,19 @@ ACmdGroup = Union[Type['CmdGroup'], 'CmdGroup']
 
 CMD_PREFIX = [".", "/"]
 
+def _accepts_arguments(callback: Callable[..., Any]) -> bool:
+    """Check that the callback takes at least one argument.
+
+    Plain functions are checked from their code object, other callables
+    (bound methods, partials ...) fall back to `inspect.signature`.
+    """
+    if isinstance(callback, FunctionType):
+        code = callback.__code__
+        return bool(code.co_argcount or code.co_kwonlyargcount
+                    or code.co_flags & (inspect.CO_VARARGS
+                                        | inspect.CO_VARKEYWORDS))
+    return len(inspect.signature(callback).parameters) > 0
+
 class CmdLog(Message):
     """Arbitrary log from a command execution.
 
@@ -93,7 +108,15 @@ class CmdLog(Message):
         return self.msg.__str__()
 
     def __rich__(self):
-        return f"\n[green]{self.msg}[/]\n"
+        return self.plain(self.msg)
+
+    @classmethod
+    def plain(cls, msg: RenderableType) -> str:
+        """Return the rendered log without creating a message.
+
+        For command outputs that are only displayed and never posted.
+        """
+        return f"\n[green]{msg}[/]\n"
 
 class Command:
     """A command class representing a command that can be executed in the REPL.
@@ -103,6 +126,9 @@ class Command:
         returns Optional[Any].
     """
 
+    __slots__ = ('name', 'alias', 'callback', 'parent', 'description', 'help',
+                 '_root')
+
     def __init__(self,
                  name: str,
                  callback: CallbackT,
@@ -115,10 +141,13 @@ class Command:
         self.alias = alias
         self.callback = callback
         self.parent: Optional[CmdGroup] = parent
+        self._root: Optional[CmdGroup] = parent._root if parent is not None else None
+
+        doc = callback.__doc__
 
         if description is MISSING:
-            if callback.__doc__:
-                self.description = callback.__doc__.splitlines()[0]
+            if doc:
+                self.description = doc.partition('\n')[0]
             else:
                 raise CommandError("Command needs a description")
         else:
@@ -127,14 +156,15 @@ class Command:
             self.description = description
 
         if help is MISSING:
-            if callback.__doc__:
-                self.help = callback.__doc__
+            if doc:
+                self.help = doc
             else:
                 self.help = "No help available"
+        else:
+            self.help = help
 
 
-        sig = inspect.signature(callback)
-        if len(sig.parameters) == 0:
+        if not _accepts_arguments(callback):
             raise CommandError("Command needs at least a context argument")
 
 
@@ -149,14 +179,7 @@ class Command:
     @property
     def root_parent(self) -> Optional['CmdGroup']:
         """Return the root parent of this command"""
-        if self.parent is None:
-            return None
-
-        root: 'CmdGroup' = self.parent
-        while root.parent is not None:
-            root = root.parent
-
-        return root
+        return self._root
 
 
     def __str__(self) -> str:
@@ -165,6 +188,9 @@ class Command:
 class CmdGroup:
     """A class representing a group of commands."""
 
+    __slots__ = ('name', 'description', '_children', 'parent', '_aliases',
+                 '_help_cache', '_root')
+
     def __init__(self,
                  name: str,
                  description: str,
@@ -173,7 +199,10 @@ class CmdGroup:
         self.name = name
         self.description = description
         self._children: Dict[str, Union[Command, CmdGroup]] = {}
+        self._aliases: Dict[str, Command] = {}
+        self._help_cache: Optional[str] = None
         self.parent: Optional[CmdGroup] = parent
+        self._root: CmdGroup = parent._root if parent is not None else self
 
     def help(self) -> str:
         """Generate the help for the current group. 
@@ -183,20 +212,23 @@ class CmdGroup:
         If the group is the root group, then it will list all the commands.
         """
 
+        if self._help_cache is not None:
+            return self._help_cache
+
         if self.is_root:
-            output = "[b]Root commands[/b]:\n\n"
+            parts = ["[b]Root commands[/b]:\n\n"]
         else:
-            output = f"Commands under {self.name}:\n\n"
+            parts = [f"Commands under {self.name}:\n\n"]
 
-        is_root_cmd = self.is_root
+        prefix = CMD_PREFIX[0] if self.is_root else ""
+        template = "[yellow]" + prefix + "{name}[/]: {desc}\n"
+        append = parts.append
 
-        for command in self.commands:
-            if is_root_cmd:
-                output += f"[yellow]{CMD_PREFIX[0]}{command.name}[/]: {command.description}\n"
-            else:
-                output += f"[yellow]{command.name}[/]: {command.description}\n"
+        for command in self._children.values():
+            append(template.format(name=command.name, desc=command.description))
 
-        return output
+        self._help_cache = ''.join(parts)
+        return self._help_cache
 
 
     def add_command(self, command: Union[Command, 'CmdGroup'], override: bool = False) -> None:
@@ -205,18 +237,32 @@ class CmdGroup:
         if not override and command.name in self._children:
             raise CommandAlreadyRegistered(command.name)
 
+        alias = command.alias if isinstance(command, Command) else None
+        if alias is not None and not override and alias in self._aliases:
+            raise CommandAlreadyRegistered(alias)
+
+        replaced = self._children.get(command.name)
+        if isinstance(replaced, Command) and replaced.alias is not None:
+            self._aliases.pop(replaced.alias, None)
+
         self._children[command.name] = command
+        if alias is not None:
+            self._aliases[alias] = command
+        self._help_cache = None
         command.parent = self
+        command._root = self._root
+        if isinstance(command, CmdGroup):
+            # the help header depends on whether the group is the root
+            command._help_cache = None
+            for child in command.walk_commands():
+                child._root = self._root
 
     def get_command(self, name: str, /) -> Optional[Union[Command, 'CmdGroup']]:
         """Retrive a command or a group from its name or alias."""
         cmd = self._children.get(name)
         if cmd is not None:
             return cmd
-        else: # search for alias
-            for command in self._children.values():
-                if isinstance(command, Command) and command.alias == name:
-                    return command
+        return self._aliases.get(name)
 
     #TEST: 
     def parse_cmd(self, cmd_list: str) -> Optional[Union[Command, 'CmdGroup']]:
@@ -224,19 +270,16 @@ class CmdGroup:
         if cmd_list == '':
             return self
 
-        cmd_list = cmd_list.split(' ')
-        if len(cmd_list) == 1:
-            return self.get_command(cmd_list[0])
-        else:
-            cmd = self.get_command(cmd_list[0])
-            if cmd is None:
+        tokens = cmd_list.split(' ')
+        cmd: Optional[Union[Command, CmdGroup]] = self
+        for i, name in enumerate(tokens):
+            if not isinstance(cmd, CmdGroup):
                 return None
-            else:
-                if isinstance(cmd, CmdGroup):
-                    return cmd.parse_cmd(' '.join(cmd_list[1:]))
-                else:
-                    return None
-            
+            # a trailing space designates the group itself, like in execute
+            if name == '' and i == len(tokens) - 1:
+                return cmd
+            cmd = cmd.get_command(name)
+        return cmd
 
     def walk_commands(self) -> Generator[Union[Command, 'CmdGroup'], None, None]:
         """Iterator that recursively walks through all commands that this group contains.
@@ -255,18 +298,22 @@ class CmdGroup:
     @property
     def root_parent(self) -> Union[Command, 'CmdGroup']:
         """Return the root parent of this group."""
-        if self.parent is None:
-            return self
-        else:
-            return self.parent.root_parent
+        return self._root
 
     @property
     def is_root(self) -> bool:
         return self.parent is None
 
     @property
-    def commands(self) -> List[Union[Command, 'CmdGroup']]:
-        """List[Union[:class:`Command`, :class:`CmdGroup`]]: The commands that this group contains."""
+    def commands(self) -> ValuesView[Union[Command, 'CmdGroup']]:
+        """ValuesView[Union[:class:`Command`, :class:`CmdGroup`]]:
+
+        The commands that this group contains.
+        """
+        return self._children.values()
+
+    def commands_list(self) -> List[Union[Command, 'CmdGroup']]:
+        """Return a list copy of the commands that this group contains."""
         return list(self._children.values())
 
     def command(self,
@@ -321,22 +368,25 @@ class CmdGroup:
 
             if description is MISSING:
                 if group_cls.__doc__:
-                    group_desc = group_cls.__doc__.splitlines()[0]
+                    group_desc = group_cls.__doc__.partition('\n')[0]
                 else:
                     raise CommandGroupError("Group needs a description")
 
             group = CmdGroup(group_name, group_desc, parent=self)
 
             # add all the methods that start with cmd_ as commands
-            for attribute_name in dir(group_cls):
-                if attribute_name.startswith("cmd_"):
+            # only the class' own attributes are scanned, in definition order
+            for attribute_name in vars(group_cls):
+                if attribute_name[:4] == "cmd_":
+                    # getattr unwraps staticmethod/classmethod descriptors
                     attribute = getattr(group_cls, attribute_name)
                     if callable(attribute):
                         command_name = attribute_name[4:]
-                        command_desc = attribute.__doc__
-                        if command_desc is None:
+                        command_doc = attribute.__doc__
+                        if command_doc is None:
                             raise CommandError(f"Command {command_name} needs a description")
-                        command = Command(command_name, attribute, command_desc)
+                        command = Command(command_name, attribute,
+                                          command_doc.partition('\n')[0])
                         group.add_command(command)
 
 
@@ -360,7 +410,7 @@ class CmdGroup:
             raise TypeError("ctx must be a Context")
 
         if command_string is None:
-            if len(self.commands) == 0:
+            if len(self._children) == 0:
                 raise NoCommandsRegistered()
             else:
                 return self.help()
@@ -368,19 +418,29 @@ class CmdGroup:
         if command_string == '':
             return self.help()
 
-        split_command = command_string.split(" ")
-        command_name = split_command[0]
-        args = split_command[1:]
+        return await self._execute_tokens(ctx, command_string.split(" "), 0,
+                                          **kwargs)
+
+    async def _execute_tokens(self, ctx: Context, tokens: List[str], i: int,
+                              **kwargs) -> AnyOrAwaitable:
+        """Execute the command found at `tokens[i]`.
+
+        The command string is split once by `execute` and the same token list is
+        walked down the group tree.
+        """
+        if i == len(tokens) or (i == len(tokens) - 1 and tokens[i] == ''):
+            return self.help()
 
+        command_name = tokens[i]
         command = self.get_command(command_name)
 
         if command is None:
             raise CommandNotFound(command_name)
 
         if isinstance(command, Command):
-            return await command.execute(ctx, *args, **kwargs)
+            return await command.execute(ctx, *tokens[i + 1:], **kwargs)
         elif isinstance(command, CmdGroup):
-            return await command.execute(ctx, " ".join(args), **kwargs)
+            return await command._execute_tokens(ctx, tokens, i + 1, **kwargs)
         else:
             raise CommandError(f"Command {command} is not a valid command or group.")
 
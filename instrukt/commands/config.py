@@ -39,4 +39,4 @@ class Config(CmdGroup):
     async def cmd_save(ctx: Context) -> CallbackOutput:
         """Save the current config."""
         ctx.config_manager.save_config()
-        return CmdLog("Config saved.")
+        return CmdLog.plain("Config saved.")
@@ -25,7 +25,7 @@ To activate these commands type `%debug` in the console.
 
 import logging
 
-from .._logging import LogCaptureHandler
+from .._logging import log_capture_handler
 from ..context import global_context
 from ..utils.debug import dap_listen
 from .command import CallbackOutput, CmdLog
@@ -34,15 +34,13 @@ from .root_cmd import ROOT as root
 
 def toggle_langchain_debug():
     """Activate debug mode."""
+    # imported on first use only
     import langchain
     langchain.debug = not langchain.debug
 
 def enable_log_debug():
     # set current log handler to debug
-    log = logging.getLogger()
-    for handler in log.handlers:
-        if isinstance(handler, LogCaptureHandler):
-            handler.setLevel(logging.DEBUG)
+    log_capture_handler.setLevel(logging.DEBUG)
 
 def toggle_app_debug() -> bool:
     """Toggle debug mode."""
@@ -55,18 +53,34 @@ def toggle_app_debug() -> bool:
         cfg.debug = True
         return True
 
-toggle_app_debug()
-toggle_langchain_debug()
-enable_log_debug()
+_initialized = False
+
+def init_debug() -> None:
+    """Activate app, langchain and log debugging.
+
+    Runs once, on the first use of the debug commands, instead of at import.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with global_context() as ctx:
+        ctx.config_manager.config.debug = True
+    toggle_langchain_debug()
+    enable_log_debug()
+    _initialized = True
 
 
 #WIP:
 @root.command
 async def toggle_dbg(ctx) -> CallbackOutput:
     """Toggle debug mode."""
+    if not _initialized:
+        init_debug()
+        return CmdLog.plain("debug mode activated")
+
     if toggle_app_debug():
-        return CmdLog("debug mode activated")
-    return CmdLog("debug mode deactivated")
+        return CmdLog.plain("debug mode activated")
+    return CmdLog.plain("debug mode deactivated")
 
 
 @root.command
@@ -74,6 +88,6 @@ async def dap(ctx) -> CallbackOutput:
     """Toggle DAP debugging"""
 
     if dap_listen():
-        return CmdLog("started DAP server")
+        return CmdLog.plain("started DAP server")
 
-    return CmdLog("DAP server already started")
+    return CmdLog.plain("DAP server already started")
@@ -20,6 +20,7 @@
 ## 
 """Help commands"""
 
+from ..errors import CommandNotFound
 from .command import CallbackOutput
 from .root_cmd import ROOT as root
 
@@ -40,6 +41,8 @@ async def help(ctx, cmd: str | None = None, *args) -> CallbackOutput:
             _cmd = root.parse_cmd(cmd_list)
         else:
             _cmd = root.get_command(cmd)
+        if _cmd is None:
+            raise CommandNotFound(' '.join((cmd, *args)).strip())
         if isinstance(_cmd.help, str):
             return _cmd.help
         return _cmd.help()
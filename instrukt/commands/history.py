@@ -22,7 +22,8 @@
 import datetime
 import os
 from collections import deque
-from typing import Any, List, Optional
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional
 
 from pydantic import BaseModel, Field, PrivateAttr
 from pydantic_yaml import YamlModelMixin
@@ -37,21 +38,94 @@ class HistEntry(YamlModelMixin, BaseModel):
     timestamp: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
 
+class _TrieNode:
+    __slots__ = ("children", "latest", "count")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        self.latest: Optional[HistEntry] = None
+        self.count = 0
+
+
+class HistoryTrie:
+    """Prefix trie over history entries.
+
+    Every node keeps the most recent entry of its subtree, so the latest
+    entry matching a prefix is found in O(len(prefix)). Entries must be
+    inserted from oldest to newest and only the oldest one can be removed,
+    which is how the bounded history deque evolves.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, entries: Iterable[HistEntry] = ()) -> None:
+        self._root = _TrieNode()
+        for entry in entries:
+            self.insert(entry)
+
+    def insert(self, entry: HistEntry) -> None:
+        """Insert the newest entry."""
+        node = self._root
+        node.latest = entry
+        node.count += 1
+        for char in entry.entry:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            child.latest = entry
+            child.count += 1
+            node = child
+
+    def remove_oldest(self, entry: HistEntry) -> None:
+        """Remove the oldest entry.
+
+        The oldest entry is only the latest of nodes that no other entry
+        goes through, so these nodes are pruned instead of updated.
+        """
+        node = self._root
+        node.count -= 1
+        if node.count == 0:
+            node.latest = None
+        for char in entry.entry:
+            child = node.children[char]
+            child.count -= 1
+            if child.count == 0:
+                del node.children[char]
+                return
+            node = child
+
+    def latest(self, prefix: str) -> Optional[HistEntry]:
+        """Return the most recent entry starting with `prefix`."""
+        node = self._root
+        for char in prefix:
+            next_node = node.children.get(char)
+            if next_node is None:
+                return None
+            node = next_node
+        return node.latest
+
+
 class CommandHistory(YamlModelMixin, BaseModel):
     max_size: int = Field(500, exclude=True)
     config: Settings = Field(default=Settings, exclude=True)
     _history: deque[HistEntry] = PrivateAttr()
     history: Optional[List[HistEntry]] = Field(None) # exported to hist file
     _current_index: int = PrivateAttr(0)
+    _trie: HistoryTrie = PrivateAttr()
 
     def __init__(self, **data: Any):
         super().__init__(**data)
         self._history = deque(maxlen=self.max_size)
+        self._trie = HistoryTrie()
 
 
     def add(self, command: str) -> None:
         """Add a command to the history."""
-        self._history.append(HistEntry(entry=command))
+        entry = HistEntry(entry=command)
+        if len(self._history) == self._history.maxlen:
+            self._trie.remove_oldest(self._history[0])
+        self._history.append(entry)
+        self._trie.insert(entry)
         self._current_index = len(self._history)
 
     def get(self, index: int) -> HistEntry:
@@ -67,23 +141,30 @@ class CommandHistory(YamlModelMixin, BaseModel):
         if os.path.exists(path):
             new_hist = self.parse_file(path)
             self.clear()
-            self._history = deque(sorted(new_hist.history, key=lambda x: x.timestamp),
+            # order by timestamp
+            self._history = deque(sorted(new_hist.history or [],
+                                         key=attrgetter("timestamp")),
                                   maxlen=self.max_size)
+            self._trie = HistoryTrie(self._history)
             self._current_index = len(self._history)
 
-
-        # order by timestamp
-        self._history = deque(sorted(self._history, key=lambda x: x.timestamp),
-                              maxlen=self.max_size)
-        self._current_index = len(self._history)
-
     def save(self) -> None:
-        """Store command history in yaml format"""
-        self.history = list(self._history)
+        """Store command history in yaml format.
+
+        Entries are written one by one under the `history` key instead of
+        serializing the whole history into a single string.
+        """
         path = self.config.history_file 
         assert path.endswith(".yaml")
         with open(path, 'w') as f:
-            f.write(self.yaml())
+            if len(self._history) == 0:
+                f.write("history: []\n")
+                return
+            f.write("history:\n")
+            for entry in self._history:
+                first, *rest = entry.yaml().splitlines(keepends=True)
+                f.write("- " + first)
+                f.writelines("  " + line for line in rest)
 
     # TEST: should get the last command
     def get_previous(self) -> HistEntry:
@@ -107,14 +188,15 @@ class CommandHistory(YamlModelMixin, BaseModel):
 
     def get_match(self, prefix: str) -> HistEntry:
         """Get the most recent command that matches the prefix."""
-        for command in reversed(self._history):
-            if command.entry.startswith(prefix):
-                return command
-        return ""
+        match = self._trie.latest(prefix)
+        if match is None:
+            return ""
+        return match
 
     def clear(self) -> None:
         """Clears the history."""
         self._history.clear()
+        self._trie = HistoryTrie()
         self._current_index = 0
 
     def __len__(self) -> int:
@@ -132,10 +214,12 @@ class CommandHistory(YamlModelMixin, BaseModel):
     def __setitem__(self, index: int, command: HistEntry):
         """Set a command in the history."""
         self._history[index] = command
+        self._trie = HistoryTrie(self._history)
 
     def __delitem__(self, index: int) -> None:
         """Delete a command from the history."""
         del self._history[index]
+        self._trie = HistoryTrie(self._history)
 
     def __repr__(self) -> str:
         """Return a string representation of the history."""
@@ -19,7 +19,8 @@
 ##  with this program.  If not, see <http://www.gnu.org/licenses/>.
 ## 
 
-from typing import TYPE_CHECKING, Tuple
+import asyncio
+from typing import TYPE_CHECKING, Optional, Tuple
 
 from ..commands.command import CallbackOutput, CmdGroup, CmdLog
 from ..commands.root_cmd import ROOT as root
@@ -28,6 +29,7 @@ from ..indexes.schema import Index
 from ..utils.asynctools import create_ctx_task, run_async
 
 if TYPE_CHECKING:
+    from instrukt.indexes.chroma import ChromaWrapper
     from instrukt.indexes.schema import Collection
 
 
@@ -40,30 +42,36 @@ class IndexCommands(CmdGroup):
     @staticmethod
     async def cmd_test(ctx: Context) -> CallbackOutput:
         """test command"""
-        return CmdLog("index test !")
+        return CmdLog.plain("index test !")
 
     @staticmethod
     async def cmd_list(ctx: Context) -> None:
         """List indexes"""
 
-        def _list_collections(ctx: Context):
+        async def _list_collections(ctx: Context):
             idx_mg = ctx.index_manager
-            _collections = idx_mg.list_collections()
-            def get_col_count(col: 'Collection') -> Tuple['Collection', int]:
-                idx = idx_mg.get_index(col.name)
+            _collections = await run_async(idx_mg.list_collections)
+
+            # indexes are resolved in one pass since get_index caches them
+            # on the manager, only the counts are fetched concurrently
+            indexes = await run_async(
+                lambda: [idx_mg.get_index(col.name) for col in _collections])
+
+            async def get_col_count(col: 'Collection',
+                                    idx: Optional['ChromaWrapper']
+                                    ) -> Tuple['Collection', int]:
                 if idx is not None:
-                    return (col, idx.count)
+                    return (col, await idx.acount())
                 return (col, -1)
-            collections = list(map(get_col_count, _collections))
-            # turn collections into tuple of (name, count) where count
-            # is idx_mg.get_index(name).count()
-            # if collection is not nont
+
+            collections = await asyncio.gather(
+                *(get_col_count(col, idx) for col, idx in zip(_collections, indexes)))
             _col_names = '\n' + '\n'.join(
                     ['- ' + f"[b]{col[0].name}[/] ({col[1]})" for col in collections]
                     )
             ctx.post_message(CmdLog(f"\n[u]Available collections:[/] {_col_names}"))
 
-        create_ctx_task(run_async(_list_collections, ctx), ctx)
+        create_ctx_task(_list_collections(ctx), ctx)
 
     @staticmethod
     async def cmd_create(
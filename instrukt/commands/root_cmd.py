@@ -20,20 +20,97 @@
 ## 
 """Root command route for the app."""
 from importlib import import_module
+from typing import Any, Dict, Generator, List, Optional, Set, Union, ValuesView
 
 from ..commands import CMD_MODULES
-from .command import CmdGroup
+from ..context import Context
+from .command import CmdGroup, Command
 
-ROOT: CmdGroup = CmdGroup("root", "root command")
 SKIP_COMMAND_TESTS: bool = False
 
 
 __all__= ['ROOT']
 
-def load_commands():
-    for module in CMD_MODULES:
-        import_module(f"instrukt.commands.{module}")
 
-# disable loading of commands when running pytest
-if not SKIP_COMMAND_TESTS:
-    load_commands()
+class RootCmdGroup(CmdGroup):
+    """Root group that imports command modules on demand.
+
+    `registry` maps root command names to the module that defines them.
+    """
+
+    __slots__ = ('_registry', '_loaded')
+
+    def __init__(self, name: str, description: str,
+                 registry: Dict[str, str]) -> None:
+        super().__init__(name, description)
+        self._registry = registry
+        self._loaded: Set[str] = set()
+
+    def _load_module(self, module: str) -> None:
+        if module not in self._loaded:
+            self._loaded.add(module)
+            import_module(f"instrukt.commands.{module}")
+
+    def load_all(self) -> None:
+        """Import all registered command modules.
+
+        Registered commands are then ordered as in the registry, whatever the
+        order their modules were loaded in, followed by other commands.
+        """
+        if len(self._loaded) == len(set(self._registry.values())):
+            return
+        for module in self._registry.values():
+            self._load_module(module)
+
+        rank = {name: i for i, name in enumerate(self._registry)}
+        last = len(rank)
+        self._children = dict(sorted(self._children.items(),
+                                     key=lambda item: rank.get(item[0], last)))
+        self._help_cache = None
+
+    def get_command(self, name: str, /) -> Optional[Union[Command, CmdGroup]]:
+        cmd = super().get_command(name)
+        if cmd is None and name in self._registry:
+            self._load_module(self._registry[name])
+            cmd = super().get_command(name)
+        return cmd
+
+    def help(self) -> str:
+        self.load_all()
+        return super().help()
+
+    def walk_commands(self) -> Generator[Union[Command, CmdGroup], None, None]:
+        self.load_all()
+        yield from super().walk_commands()
+
+    @property
+    def commands(self) -> ValuesView[Union[Command, CmdGroup]]:
+        self.load_all()
+        return self._children.values()
+
+    def commands_list(self) -> List[Union[Command, CmdGroup]]:
+        self.load_all()
+        return super().commands_list()
+
+    async def execute(self, ctx: Context, command_string: Optional[str] = None,
+                      **kwargs) -> Any:
+        if command_string is None:
+            self.load_all()
+        return await super().execute(ctx, command_string, **kwargs)
+
+
+def _build_registry() -> Dict[str, str]:
+    # disable loading of commands when running pytest
+    if SKIP_COMMAND_TESTS:
+        return {}
+    return {name: module
+            for module, names in CMD_MODULES.items()
+            for name in names}
+
+
+ROOT: RootCmdGroup = RootCmdGroup("root", "root command", _build_registry())
+
+
+def load_commands():
+    """Import all command modules instead of waiting for their first use."""
+    ROOT.load_all()
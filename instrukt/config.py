@@ -20,21 +20,28 @@
 ##
 """Config manager for instrukt"""
 
+import hashlib
+import json
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, ClassVar, Optional, Tuple, Union
+from typing import Any, ClassVar, Dict, Optional, Tuple, Union
 
+import yaml
 from pydantic import (
     BaseSettings,
     Field,
     SecretStr,
+    ValidationError,
     root_validator,
     validator,
 )
 from pydantic_yaml import YamlModelMixin
 from xdg import BaseDirectory  # type: ignore
 
+from .console_capture import set_debug
 from .errors import ConfigError
+from .utils.misc import cached_import
 
 try:
     import chromadb
@@ -42,7 +49,19 @@ try:
 except ModuleNotFoundError:
     CHROMA_INSTALLED = False
 
-CONFIG_PATH = BaseDirectory.save_config_path("instrukt")
+@lru_cache(maxsize=None)
+def _xdg(kind: str, *parts: str) -> str:
+    """Return (and create) an XDG save path, resolved once per process."""
+    return getattr(BaseDirectory, f"save_{kind}_path")(*parts)
+
+
+CONFIG_PATH = _xdg("config", "instrukt")
+
+# use the libyaml loader when available
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# environment variables that can change the resulting settings
+_SETTINGS_ENV_PREFIXES = ("INSTRUKT_", "OPENAI_", "XDG_")
 
 if CHROMA_INSTALLED:
 
@@ -54,6 +73,21 @@ if CHROMA_INSTALLED:
         persist_directory: str = "chroma_persist"
         anonymized_telemetry: bool = False
         is_persistent: bool = True
+
+        # HNSW index parameters of new collections
+        hnsw_space: str = "cosine"
+        hnsw_M: int = 32
+        hnsw_construction_ef: int = 200
+        hnsw_search_ef: int = 64
+
+        def hnsw_metadata(self) -> Dict[str, Any]:
+            """HNSW parameters as chroma collection metadata."""
+            return {
+                "hnsw:space": self.hnsw_space,
+                "hnsw:M": self.hnsw_M,
+                "hnsw:construction_ef": self.hnsw_construction_ef,
+                "hnsw:search_ef": self.hnsw_search_ef,
+            }
 else:
 
     class ChromaSettings(BaseSettings):  # type: ignore
@@ -126,17 +160,22 @@ class Settings(YamlModelMixin, BaseSettings):  # type: ignore
 
     use_llm_cache: bool = False
 
-    sqlite_cache_path: str = os.path.join(
-        BaseDirectory.save_cache_path("instrukt"), "cache.sqlite")
+    sqlite_cache_path: str = os.path.join(_xdg("cache", "instrukt"),
+                                          "cache.sqlite")
 
-    llm_errors_logdir: str = os.path.join(
-        BaseDirectory.save_cache_path("instrukt", "llm_errors"))
+    llm_errors_logdir: str = _xdg("cache", "instrukt", "llm_errors")
 
-    custom_agents_path: str = BaseDirectory.save_data_path("instrukt/agents")
+    custom_agents_path: str = _xdg("data", "instrukt/agents")
 
     # TUI SETTINGS
     interface: TUISettings = Field(default_factory=TUISettings)
 
+    @validator("debug")
+    def sync_debug(cls, v):
+        """Propagate debug changes to the console log filters."""
+        set_debug(v)
+        return v
+
     @root_validator(skip_on_failure=True)
     def validate_config(cls, values):
         if CHROMA_INSTALLED:
@@ -144,13 +183,12 @@ class Settings(YamlModelMixin, BaseSettings):  # type: ignore
                 values["chroma"]["persist_directory"])
             if not chroma_persist_directory.is_absolute():
                 _chroma_persist_directory = \
-                    os.path.join(BaseDirectory.save_data_path("instrukt"),
+                    os.path.join(_xdg("data", "instrukt"),
                                  str(chroma_persist_directory))
 
-                values["chroma"] = ChromaSettings(
-                    **values["chroma"].dict(exclude={"persist_directory"}),
-                    persist_directory=_chroma_persist_directory,
-                )
+                # set in place instead of validating new chroma settings
+                object.__setattr__(values["chroma"], "persist_directory",
+                                   _chroma_persist_directory)
 
         return values
 
@@ -162,9 +200,9 @@ class Settings(YamlModelMixin, BaseSettings):  # type: ignore
     @validator("openai_api_key")
     def validate_api_key(cls, v, field):
         """Warning for missing API key."""
-        from instrukt.messages.log import LogMessage
         if not v and not cls._openai_api_key_warning:
-            from .context import context_var
+            LogMessage = cached_import("instrukt.messages.log", "LogMessage")
+            context_var = cached_import("instrukt.context", "context_var")
             warning = LogMessage.warning(
                 f"[yellow]`{field.name}`[/] is not set. Some features may not work."
             )
@@ -184,19 +222,31 @@ class Settings(YamlModelMixin, BaseSettings):  # type: ignore
 
 class ConfigManager():
 
-    def __init__(self, config_file: str = "instrukt.yml"):
+    __slots__ = ("config", "config_path", "cache_path")
 
-        self.config = Settings()  # type: ignore
+    def __init__(self, config_file: str = "instrukt.yml"):
 
-        if bool(self.config.openai_api_key):
-            Settings._openai_api_key_warning = True
+        self.config_path = os.path.join(CONFIG_PATH, config_file)
+        self.cache_path = os.path.join(_xdg("cache", "instrukt"),
+                                       f".{config_file}.cache")
 
-        self.config_path = os.path.join(
-            BaseDirectory.save_config_path("instrukt"), config_file)
-        if os.path.exists(self.config_path):
-            self.load_config()
+        cached = self._load_cached()
+        if cached is not None:
+            self.config = cached
         else:
-            self.save_config()
+            self.config = Settings()  # type: ignore
+
+            if bool(self.config.openai_api_key):
+                Settings._openai_api_key_warning = True
+
+            if os.path.exists(self.config_path):
+                self.load_config()
+                self._save_cached()
+            else:
+                self.save_config()
+
+        # the debug validator does not run on the default value
+        set_debug(self.config.debug)
 
         # add custom agent path to sys.path
         import sys
@@ -211,15 +261,87 @@ class ConfigManager():
         if os.path.getsize(self.config_path) == 0:
             raise ConfigError("Config file is empty.")
 
-        parsed = self.config.parse_file(self.config_path)
-        if len(parsed.openai_api_key) == 0:
-            parsed = Settings(**parsed.dict())
+        # the loader reads the file object in chunks
+        with open(self.config_path, "rb", buffering=65536) as f:
+            data = yaml.load(f, Loader=_YamlLoader) or {}
+        parsed = Settings.parse_obj(data)
+        if not parsed.openai_api_key:
+            env_key = self._env_api_key()
+            if env_key:
+                # set the key from the environment without validating the
+                # whole model a second time
+                try:
+                    object.__setattr__(parsed, "openai_api_key",
+                                       SecretStr(env_key))
+                    parsed.__fields_set__.add("openai_api_key")
+                except Exception:
+                    parsed = Settings(**parsed.dict())
         self.config = parsed
 
     def save_config(self) -> None:
         with open(self.config_path, "w") as f:
             f.write(self.config.yaml(exclude={'openai_api_key'}))
 
+    def _cache_stamp(self) -> Tuple[Any, ...]:
+        """Identify the config file, environment and settings schema."""
+        st = os.stat(self.config_path)
+        env = hashlib.sha256()
+        for k, v in sorted(os.environ.items()):
+            if k.startswith(_SETTINGS_ENV_PREFIXES):
+                env.update(f"{k}={v}\0".encode())
+        # nested settings classes are defined in this module
+        schema = (tuple(Settings.__fields__), os.stat(__file__).st_mtime_ns)
+        return (self.config_path, st.st_mtime_ns, st.st_size,
+                env.hexdigest(), schema)
+
+    @staticmethod
+    def _env_api_key() -> str:
+        return os.environ.get("INSTRUKT_OPENAI_API_KEY",
+                              os.environ.get("OPENAI_API_KEY", ""))
+
+    def _cache_digest(self) -> str:
+        return hashlib.sha256(repr(self._cache_stamp()).encode()).hexdigest()
+
+    def _load_cached(self) -> Optional[Settings]:
+        """Return the settings cached by a previous run.
+
+        The cache holds the validated settings as plain JSON data, they are
+        validated again without reading the YAML config file.
+
+        Returns None if the cache is missing or the config file, the
+        environment or the settings schema changed since it was written.
+        """
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = json.load(f)
+            if cached["stamp"] != self._cache_digest():
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        # the api key is never written to the cache, it is read from the
+        # environment again, including the missing key warning
+        try:
+            return Settings.parse_obj(cached["config"])
+        except ValidationError:
+            return None
+
+    def _save_cached(self) -> None:
+        """Cache the validated settings for the next run."""
+        # the key is restored from the environment, do not cache a key that
+        # comes from the config file
+        key = self.config.openai_api_key
+        if (key.get_secret_value() if key else "") != self._env_api_key():
+            return
+        try:
+            config = json.loads(self.config.json(exclude={"openai_api_key"}))
+            data = json.dumps({"stamp": self._cache_digest(),
+                               "config": config})
+            with open(self.cache_path, "w") as f:
+                f.write(data)
+        except (OSError, TypeError, ValueError):
+            pass
+
     def set(self, key: Any, value: Any):
         setattr(self.config, key, value)
 
@@ -230,8 +352,19 @@ class ConfigManager():
 CONF_MANAGER = ConfigManager()
 APP_SETTINGS = CONF_MANAGER.config
 
-if APP_SETTINGS.use_llm_cache:
+_llm_cache_enabled = False
+
+def ensure_llm_cache() -> None:
+    """Setup the langchain LLM cache if enabled in the settings.
+
+    Called before creating LLMs so that langchain is not imported with the
+    config.
+    """
+    global _llm_cache_enabled
+    if _llm_cache_enabled or not APP_SETTINGS.use_llm_cache:
+        return
     import langchain
     from langchain.cache import SQLiteCache
     langchain.llm_cache = SQLiteCache(
         database_path=APP_SETTINGS.sqlite_cache_path)
+    _llm_cache_enabled = True
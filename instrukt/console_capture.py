@@ -23,23 +23,64 @@
 from abc import ABC
 import re
 from logging import Filter, Formatter, LogRecord
-from typing import ClassVar, Sequence
+from typing import ClassVar, Iterable, Optional, Sequence, Union
+
+# mirrors the `debug` setting, kept in sync by the Settings model
+_debug = False
+
+def set_debug(debug: bool) -> None:
+    """Let all records through the console filters when debug is on."""
+    global _debug
+    _debug = debug
+
+
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"),
+                 (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+def _combine_patterns(
+        patterns: Iterable[Union[str, re.Pattern[str]]]
+) -> Optional[re.Pattern[str]]:
+    """Compile patterns into a single alternation, keeping their flags.
+
+    Patterns given as strings are used as is.
+    """
+    parts = []
+    for p in patterns:
+        if isinstance(p, str):
+            parts.append(f"(?:{p})")
+            continue
+        flags = "".join(f for flag, f in _INLINE_FLAGS if p.flags & flag)
+        parts.append(f"(?{flags}:{p.pattern})")
+    if not parts:
+        return None
+    return re.compile("|".join(parts))
+
+
+# shared by all the filters and the log capture handler
+FORMATTER = Formatter('%(message)s')
 
 
 class ConsoleFilter(Filter, ABC):
     """Base filter class to use with output and log capture."""
 
     modules: ClassVar[Sequence[str]] = []
-    formatter: ClassVar[Formatter] = Formatter('%(message)s')
-    patterns: ClassVar[Sequence[re.Pattern]] = []
+    formatter: ClassVar[Formatter] = FORMATTER
+    patterns: ClassVar[Sequence[re.Pattern[str]]] = []
+    _class_prefixes: ClassVar[tuple[str, ...]] = ()
+    _module_filters: frozenset[str]
+    _pattern_filters: frozenset[Union[str, re.Pattern[str]]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._class_prefixes = tuple(cls.modules)
 
     def __init__(self,
                  module_filters: list[str] = [],
                  pattern_filters: list[str] = [],
                  **kwargs):
         super().__init__(**kwargs)
-        self._module_filters = set(module_filters)
-        self._pattern_filters = set(pattern_filters)
+        self.pattern_filters = pattern_filters
+        self.module_filters = module_filters
 
     @property
     def module_filters(self):
@@ -47,7 +88,12 @@ class ConsoleFilter(Filter, ABC):
 
     @module_filters.setter
     def module_filters(self, val):
-        self._module_filters = val
+        self._module_filters = frozenset(val)
+        # str.startswith accepts a tuple of prefixes
+        if self._module_filters:
+            self._prefixes = tuple(self._module_filters.union(self.modules))
+        else:
+            self._prefixes = self._class_prefixes
 
     @property
     def pattern_filters(self):
@@ -55,48 +101,58 @@ class ConsoleFilter(Filter, ABC):
 
     @pattern_filters.setter
     def pattern_filters(self, val):
-        self._pattern_filters = val
+        self._pattern_filters = frozenset(val)
+        self._pattern = _combine_patterns(self.pattern_filters)
 
     def match(self, record: LogRecord) -> bool:
         """Check if record should be filtered."""
-        return any(p.match(record.getMessage())
-                   for p in self.pattern_filters)
+        if self._pattern is None:
+            return False
+        # skip the formatting step when the message is a plain string
+        msg = record.msg
+        if record.args or not isinstance(msg, str):
+            msg = record.getMessage()
+        return self._pattern.search(msg) is not None
 
     def filter(self, record: LogRecord) -> bool:
         """Implements logging.Filter"""
-        from .config import APP_SETTINGS
-        if APP_SETTINGS.debug:
+        if _debug:
             return True
         return self.match(record) or self._filter(record)
 
     def _filter(self, record: LogRecord) -> bool:
-        return any(record.name.startswith(module)
-                   for module in self.module_filters)
+        return record.name.startswith(self._prefixes)
+
+    @staticmethod
+    def _combined(
+            module_filters: frozenset[str],
+            pattern_filters: frozenset[Union[str, re.Pattern[str]]]
+    ) -> 'ConsoleFilter':
+        """Build a filter from already merged sets, skipping the setters."""
+        new_filter = ConsoleFilter.__new__(ConsoleFilter)
+        Filter.__init__(new_filter)
+        new_filter._module_filters = module_filters
+        new_filter._pattern_filters = pattern_filters
+        new_filter._prefixes = tuple(module_filters)
+        new_filter._pattern = _combine_patterns(pattern_filters)
+        return new_filter
 
     def __or__(self, other):
-        new_filter = ConsoleFilter(module_filters=self.module_filters,
-                                   pattern_filters=self.pattern_filters)
-        new_filter.module_filters = new_filter.module_filters.union(
-            other.module_filters)
-        new_filter.pattern_filters = new_filter.pattern_filters.union(
-            other.pattern_filters)
-        return new_filter
+        return ConsoleFilter._combined(
+            frozenset(self.module_filters | other.module_filters),
+            frozenset(self.pattern_filters | other.pattern_filters))
 
     def __and__(self, other):
-        new_filter = ConsoleFilter(module_filters=self.module_filters,
-                                   pattern_filters=self.pattern_filters)
-        new_filter.module_filters = new_filter.module_filters.intersection(
-            other.module_filters)
-        new_filter.pattern_filters = new_filter.pattern_filters.intersection(
-            other.pattern_filters)
-        return new_filter
+        return ConsoleFilter._combined(
+            frozenset(self.module_filters & other.module_filters),
+            frozenset(self.pattern_filters & other.pattern_filters))
 
 
 class ErrorF(ConsoleFilter):
     """Matches errors and exceptions"""
     # match error | exception anywhere case insensitive
     patterns = (
-            re.compile(r".*(error|exception).*", re.IGNORECASE),
+            re.compile(r"error|exception", re.IGNORECASE),
             )
 
 
@@ -109,3 +165,9 @@ class IndexCreationF(ConsoleFilter):
             "sentence_transformers",
             "instrukt.indexes",
             "pdfminer" )
+
+
+# ready to use filter instances
+ERROR_F = ErrorF()
+LANGCHAIN_F = LangchainF()
+INDEX_CREATION_F = IndexCreationF()
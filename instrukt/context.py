@@ -24,6 +24,8 @@ from contextlib import contextmanager
 from contextvars import ContextVar
 from typing import TYPE_CHECKING
 
+from .utils.misc import cached_import
+
 if TYPE_CHECKING:
 
     from .app import InstruktApp
@@ -60,13 +62,17 @@ log = logging.getLogger(__name__)
 class Context():
     """Stores a reference to textual App context"""
 
-    # def __init__(self) -> None:
-        # from .config import ConfigManager
-        # from .indexes.manager import IndexManager
+    __slots__ = ("_app", "_config_manager", "_im_cache",
+                 "_log_error", "_log_info")
 
-        # self.config_manager = ConfigManager()
-        # self.index_manager = IndexManager(
-        #     chroma_settings=self.config_manager.config.chroma, )
+    def __init__(self, app: t.Optional['InstruktApp'] = None) -> None:
+        self._app = app
+        self._config_manager: t.Optional['ConfigManager'] = None
+        self._im_cache = None
+        # bind the notification factories once
+        LogMessage = cached_import("instrukt.messages.log", "LogMessage")
+        self._log_error = LogMessage.error
+        self._log_info = LogMessage.info
 
     def __repr__(self):
         return f"Context(app={self.app})"
@@ -74,9 +80,7 @@ class Context():
     @property
     def app(self) -> t.Optional['InstruktApp']:
         """The app property."""
-        if hasattr(self, "_app"):
-            return self._app
-        return None
+        return self._app
 
     @app.setter
     def app(self, value):
@@ -85,13 +89,17 @@ class Context():
     @property
     def index_manager(self) -> 'IndexManager':
         """The index_manager property."""
-        im = index_manager_var.get()
-        assert im is not None, "index_manager is None"
+        im = self._im_cache
+        if im is None:
+            im = index_manager_var.get()
+            assert im is not None, "index_manager is None"
+            self._im_cache = im
         return im
 
     @index_manager.setter
     def index_manager(self, value):
         index_manager_var.set(value)
+        self._im_cache = None
 
     @property
     def im(self) -> 'IndexManager':
@@ -108,19 +116,6 @@ class Context():
     def config_manager(self, value):
         self._config_manager = value
 
-    # @property
-    # def config_manager(self) -> 'ConfigManager':
-    #     """The config_manager property."""
-    #     cm = config_manager_var.get()
-    #     assert cm is not None, "config_manager is None"
-    #     return cm
-
-    # @config_manager.setter
-    # def config_manager(self, value):
-    #     config_manager_var.set(value)
-
-
-
     @property
     def cm(self) -> 'ConfigManager':
         """The config_manager property."""
@@ -140,13 +135,11 @@ class Context():
 
     def error(self, message: 'MsgType') -> None:
         """Send and error notification to the UI."""
-        from .messages.log import LogMessage
-        self.app.post_message(LogMessage.error(message))
+        self.app.post_message(self._log_error(message))
 
     def info(self, message: 'MsgType') -> None:
         """Send an info notification to the UI."""
-        from .messages.log import LogMessage
-        self.app.post_message(LogMessage.info(message))
+        self.app.post_message(self._log_info(message))
 
 
 def init_context() -> None:
@@ -6,44 +6,44 @@ class InstruktError(Exception):
 
     Errors shoudl be rich renderables.
     """
-    pass
+    __slots__ = ()
 
 class CommandError(InstruktError):
-    pass
+    __slots__ = ()
 
 class CommandGroupError(CommandError):
-    pass
+    __slots__ = ()
 
 class CommandHandlerError(CommandError):
-    pass
+    __slots__ = ()
 
 class CommandNotFound(CommandError):
-    pass
+    __slots__ = ()
 
 class NoCommandsRegistered(CommandError):
-    pass
+    __slots__ = ()
 
 class UnknownCommand(CommandError):
-    pass
+    __slots__ = ()
 
 class InvalidArguments(CommandError):
-    pass
+    __slots__ = ()
 
 class CommandAlreadyRegistered(CommandError):
-    pass
+    __slots__ = ()
 
 class AgentError(InstruktError):
     """Agents errors."""
-    pass
+    __slots__ = ()
 
 class IndexError(InstruktError):
-    pass
+    __slots__ = ()
 
 class ToolError(InstruktError):
-    pass
+    __slots__ = ()
 
 class LoaderError(InstruktError):
-    pass
+    __slots__ = ()
 
 class ConfigError(InstruktError):
-    pass
+    __slots__ = ()
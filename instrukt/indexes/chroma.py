@@ -20,25 +20,46 @@
 ##
 """Chroma wrapper and utils."""
 
+import asyncio
+import hashlib
 import logging
-from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Union, cast
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+import numpy as np
 from langchain.embeddings import (
+    HuggingFaceBgeEmbeddings,
     HuggingFaceEmbeddings,
     HuggingFaceInstructEmbeddings,
-    HuggingFaceBgeEmbeddings,
     OpenAIEmbeddings,
 )
 from langchain.vectorstores import Chroma as ChromaVectorStore
 
-from ..config import CHROMA_INSTALLED
-from ..utils.asynctools import run_async
+from ..config import CHROMA_INSTALLED, ChromaSettings
+from .embeddings import get_hf_embeddings
 from .retrieval.qa_tool import retrieval_tool_from_index
 from .schema import Collection
 
 if TYPE_CHECKING:
     import chromadb
     from langchain.embeddings.base import Embeddings
+    from langchain.schema import Document
 
     from ..tools.base import SomeTool
 
@@ -49,10 +70,50 @@ TEmbeddings = Union["Embeddings", "HuggingFaceEmbeddings",
 
 DEFAULT_EMBEDDINGS_MODEL = "sentence-transformers/all-mpnet-base-v2"
 
+# HNSW parameters of new collections, the defaults of ChromaSettings
+DEFAULT_HNSW_METADATA = ChromaSettings.construct().hnsw_metadata()
+
+def _fqn(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__name__}"
+
+
+# embedding class -> (fully qualified name, attribute holding the model name)
+_EMB_META: dict[type, tuple[str, str]] = {
+    HuggingFaceEmbeddings: (_fqn(HuggingFaceEmbeddings), "model_name"),
+    HuggingFaceInstructEmbeddings: (_fqn(HuggingFaceInstructEmbeddings),
+                                    "model_name"),
+    HuggingFaceBgeEmbeddings: (_fqn(HuggingFaceBgeEmbeddings), "model_name"),
+    OpenAIEmbeddings: (_fqn(OpenAIEmbeddings), "model"),
+}
+
+# chroma client state is not thread safe, async calls to chroma are all
+# serialized on a single worker thread
+_chroma_executor: ThreadPoolExecutor | None = None
+
+
+async def run_chroma(func, *args, **kwargs):
+    """Run a chroma call on the dedicated chroma worker thread."""
+    global _chroma_executor
+    if _chroma_executor is None:
+        _chroma_executor = ThreadPoolExecutor(max_workers=1,
+                                              thread_name_prefix="chroma")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_chroma_executor,
+                                      partial(func, *args, **kwargs))
+
 
 class ChromaWrapper(ChromaVectorStore):
     """Wrapper around Chroma DB."""
 
+    #: max number of ids deleted in a single chroma call by `adelete`
+    MAX_DELETE_BATCH = 512
+    #: how long `adelete` waits for more ids to delete in the same batch
+    DELETE_BATCH_WINDOW = 0.005
+    #: number of documents embedded and upserted at once when adding
+    EMBED_BATCH_SIZE = 256
+    #: max number of query results kept by the query cache
+    QUERY_CACHE_SIZE = 1024
+
     def __init__(self,
                  client: "chromadb.Client",
                  collection_name: str,
@@ -66,24 +127,9 @@ class ChromaWrapper(ChromaVectorStore):
                 " chromadb is required for using instrukt knowledge features."
                 " Please install it with `pip install instrukt[chromadb]`")
 
-        collection_metadata = collection_metadata or {}
-
         if embedding_function is None:
-            embedding_function = HuggingFaceEmbeddings(
-                model_name=DEFAULT_EMBEDDINGS_MODEL)
-
-        embedding_fn_fqn = f"{type(embedding_function).__module__}.{type(embedding_function).__name__}"
-
-        collection_metadata["embedding_fn"] = embedding_fn_fqn
-
-        if type(embedding_function) in (HuggingFaceEmbeddings,
-                                        HuggingFaceInstructEmbeddings,
-                                        HuggingFaceBgeEmbeddings):
-            collection_metadata["model_name"] = cast(
-                "HuggingFaceEmbeddings", embedding_function).model_name
-        elif type(embedding_function) in (OpenAIEmbeddings, ):
-            collection_metadata["model_name"] = cast(OpenAIEmbeddings,
-                                                     embedding_function).model
+            embedding_function = get_hf_embeddings(HuggingFaceEmbeddings,
+                                                   DEFAULT_EMBEDDINGS_MODEL)
 
         _kwargs = {
             **kwargs,
@@ -92,26 +138,274 @@ class ChromaWrapper(ChromaVectorStore):
                 "collection_name": collection_name,
             }
         }
+        # metadata is only written when the collection is created
         if not loading:
-            _kwargs["collection_metadata"] = collection_metadata
+            _kwargs["collection_metadata"] = self._build_metadata(
+                embedding_function, collection_metadata)
         _kwargs["embedding_function"] = embedding_function
         super().__init__(**_kwargs)
 
+        self._delete_queue: asyncio.Queue | None = None
+        self._delete_task: asyncio.Task | None = None
+        self._qcache: OrderedDict[Hashable, Any] = OrderedDict()
+        self._qcache_gen = 0
+        self._qcache_lock = threading.Lock()
+
+    @staticmethod
+    def _build_metadata(embedding_function: TEmbeddings,
+                        extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Collection metadata identifying the embedding function.
+
+        The HNSW defaults are added unless `extra` overrides them.
+        """
+        metadata = {**DEFAULT_HNSW_METADATA, **(extra or {})}
+
+        # cached embeddings are stored with the metadata of the wrapped model
+        emb_fn = getattr(embedding_function, "underlying_embeddings",
+                         embedding_function)
+        emb_cls = type(emb_fn)
+        emb_meta = _EMB_META.get(emb_cls)
+        if emb_meta is not None:
+            embedding_fn_fqn, model_attr = emb_meta
+            metadata["embedding_fn"] = embedding_fn_fqn
+            metadata["model_name"] = getattr(emb_fn, model_attr)
+        else:
+            metadata["embedding_fn"] = _fqn(emb_cls)
+        return metadata
+
+    def _collection_changed(self) -> None:
+        """Drop the state derived from the collection content.
+
+        Call it once a mutation has been applied, a query running before
+        would cache the old content again.
+        """
+        with self._qcache_lock:
+            self._qcache.clear()
+            self._qcache_gen += 1
+
+    def _cached_query(self, key: Tuple[Any, ...], embedding: List[float],
+                      compute: Callable[[], Any]) -> Any:
+        """Return the cached result of a query, computing it on a miss.
+
+        Queries are identified by a hash of their embedding and `key`.
+        """
+        digest = hashlib.blake2b(
+            np.asarray(embedding, dtype=np.float32).tobytes(),
+            digest_size=16).digest()
+        key = (digest, *key)
+        with self._qcache_lock:
+            if key in self._qcache:
+                self._qcache.move_to_end(key)
+                return list(self._qcache[key])
+            gen = self._qcache_gen
+        result = compute()
+        with self._qcache_lock:
+            # the collection changed while computing, the result may be stale
+            if gen != self._qcache_gen:
+                return list(result)
+            self._qcache[key] = result
+            if len(self._qcache) > self.QUERY_CACHE_SIZE:
+                self._qcache.popitem(last=False)
+        return list(result)
+
+    def add_texts(self, *args: Any, **kwargs: Any) -> List[str]:
+        ids = super().add_texts(*args, **kwargs)
+        self._collection_changed()
+        return ids
+
+    def delete(self, *args: Any, **kwargs: Any) -> None:
+        super().delete(*args, **kwargs)
+        self._collection_changed()
+
+    def similarity_search_with_score(
+            self,
+            query: str,
+            k: int = 4,
+            filter: Dict[str, str] | None = None,
+            **kwargs: Any) -> List[Tuple["Document", float]]:
+        """Similarity search with distances, results are cached."""
+        if self._embedding_function is None:
+            return super().similarity_search_with_score(query, k, filter,
+                                                        **kwargs)
+        embedding = self._embedding_function.embed_query(query)
+        return self._cached_query(
+            ("score", k, repr(filter)), embedding,
+            lambda: self.similarity_search_by_vector_with_relevance_scores(
+                embedding, k, filter))
+
+    def max_marginal_relevance_search_by_vector(
+            self,
+            embedding: List[float],
+            k: int = 4,
+            fetch_k: int = 20,
+            lambda_mult: float = 0.5,
+            filter: Dict[str, str] | None = None,
+            **kwargs: Any) -> List["Document"]:
+        """MMR search by vector, results are cached."""
+        return self._cached_query(
+            ("mmr", k, fetch_k, lambda_mult, repr(filter)), embedding,
+            lambda: super(ChromaWrapper, self).
+            max_marginal_relevance_search_by_vector(
+                embedding, k, fetch_k, lambda_mult, filter, **kwargs))
+
     async def adelete(self,
                       ids: list[str] | None = None,
                       where: dict[Any, Any] | None = None):
-        await run_async(self._collection.delete, ids=ids, where=where)
+        """Delete documents from the collection.
+
+        Deletes by ids that happen concurrently are coalesced into a single
+        chroma call.
+        """
+        if ids is None or where is not None:
+            await run_chroma(self._collection.delete, ids=ids, where=where)
+            self._collection_changed()
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        if self._delete_task is None:
+            self._delete_queue = asyncio.Queue()
+            self._delete_task = asyncio.create_task(self._delete_worker(
+                self._delete_queue))
+        assert self._delete_queue is not None
+        self._delete_queue.put_nowait((ids, done))
+        await done
+
+    async def _delete_worker(self, queue: asyncio.Queue) -> None:
+        """Drain the delete queue in batches, exits once it is empty."""
+        while True:
+            batch = [queue.get_nowait()]
+            count = len(batch[0][0])
+            while count < self.MAX_DELETE_BATCH:
+                try:
+                    item = await asyncio.wait_for(queue.get(),
+                                                  self.DELETE_BATCH_WINDOW)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                count += len(item[0])
+
+            batch_ids = [id_ for ids, _ in batch for id_ in ids]
+            try:
+                await run_chroma(self._collection.delete, ids=batch_ids)
+            except Exception as e:
+                for _, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+            else:
+                self._collection_changed()
+                for _, done in batch:
+                    if not done.done():
+                        done.set_result(None)
+
+            if queue.empty():
+                self._delete_task = None
+                return
 
     async def adelete_collection(self):
-        await run_async(self._client.delete_collection, self._collection.name)
+        await run_chroma(self._client.delete_collection, self._collection.name)
 
     async def adelete_named_collection(self, collection_name: str):
-        await run_async(self._client.delete_collection, collection_name)
+        await run_chroma(self._client.delete_collection, collection_name)
+
+    def _embed(self, texts: List[str], batch_size: int) -> List[List[float]]:
+        """Compute the embeddings of `texts` outside of chroma.
+
+        Sentence transformer models are called directly with a numpy output,
+        other embedding functions go through `embed_documents`.
+        """
+        emb_fn = self._embedding_function
+        assert emb_fn is not None
+        if type(emb_fn) in (HuggingFaceEmbeddings, HuggingFaceBgeEmbeddings) \
+                and not getattr(emb_fn, "multi_process", False):
+            # same preprocessing as the langchain embed_documents
+            texts = [text.replace("\n", " ") for text in texts]
+            encode_kwargs = {**emb_fn.encode_kwargs,
+                             "batch_size": batch_size,
+                             "convert_to_numpy": True}
+            return emb_fn.client.encode(texts, **encode_kwargs).tolist()
+        return emb_fn.embed_documents(texts)
+
+    @staticmethod
+    def _batches(items: Iterable[Any], batch_size: int):
+        batch: list[Any] = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _with_ids(documents: List["Document"],
+                  kwargs: dict[str, Any]) -> Iterable[tuple[str, "Document"]]:
+        """Pair documents with the `ids` passed by the caller or new ones."""
+        ids = kwargs.pop("ids", None)
+        if kwargs:
+            raise TypeError(
+                f"unexpected keyword arguments: {', '.join(kwargs)}")
+        if ids is None:
+            return ((str(uuid.uuid4()), doc) for doc in documents)
+        if len(ids) != len(documents):
+            raise ValueError(
+                f"got {len(ids)} ids for {len(documents)} documents")
+        return zip(ids, documents)
+
+    @staticmethod
+    def _upsert_kwargs(batch: List[tuple[str, "Document"]],
+                       embeddings: List[List[float]]) -> dict[str, Any]:
+        return dict(ids=[id_ for id_, _ in batch],
+                    embeddings=embeddings,
+                    documents=[d.page_content for _, d in batch],
+                    metadatas=[d.metadata or None for _, d in batch])
+
+    def add_documents(self,
+                      documents: List["Document"],
+                      batch_size: int | None = None,
+                      **kwargs: Any) -> List[str]:
+        """Embed and add documents in batches of `batch_size`.
+
+        Embeddings are precomputed and passed to chroma, skipping its own
+        embedding step. Batching bounds the memory used by large indexes.
+        Documents are upserted under the given `ids` if any.
+        """
+        batch_size = batch_size or self.EMBED_BATCH_SIZE
+        ids: List[str] = []
+        for batch in self._batches(self._with_ids(documents, kwargs),
+                                   batch_size):
+            embeddings = self._embed([d.page_content for _, d in batch],
+                                     batch_size)
+            upsert = self._upsert_kwargs(batch, embeddings)
+            self._collection.upsert(**upsert)
+            self._collection_changed()
+            ids.extend(upsert["ids"])
+        return ids
+
+    async def aadd_documents(self,
+                             documents: List["Document"],
+                             batch_size: int | None = None,
+                             **kwargs: Any) -> List[str]:
+        """Async version of `add_documents`.
 
-    #TODO: async document adding
+        Embeddings are computed in the default executor, the upserts run on
+        the chroma worker thread.
+        """
+        batch_size = batch_size or self.EMBED_BATCH_SIZE
+        loop = asyncio.get_running_loop()
+        ids: List[str] = []
+        for batch in self._batches(self._with_ids(documents, kwargs),
+                                   batch_size):
+            embeddings = await loop.run_in_executor(
+                None, self._embed, [d.page_content for _, d in batch],
+                batch_size)
+            upsert = self._upsert_kwargs(batch, embeddings)
+            await run_chroma(self._collection.upsert, **upsert)
+            self._collection_changed()
+            ids.extend(upsert["ids"])
+        return ids
 
     async def acount(self) -> int:
-        return await run_async(self._collection.count)
+        return await run_chroma(self._collection.count)
 
     @property
     def count(self) -> int:
@@ -19,49 +19,179 @@
 ##  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 ##
 """Embeddings used in indexes."""
+import re
 import typing as t
+from functools import lru_cache
+from importlib import import_module
+from types import MappingProxyType
 from typing import NamedTuple
 
-from langchain.embeddings import (
-    HuggingFaceEmbeddings,
-    HuggingFaceInstructEmbeddings,
-    HuggingFaceBgeEmbeddings,
-    OpenAIEmbeddings,
-)
-
 if t.TYPE_CHECKING:
     from langchain.embeddings.base import Embeddings
 
 
+_resolved: dict[str, t.Type["Embeddings"]] = {}
+
+
+@lru_cache(maxsize=1)
+def auto_device() -> str:
+    """Return the best torch device available for local embedding models."""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+@lru_cache(maxsize=8)
+def get_hf_embeddings(cls: t.Type["Embeddings"],
+                      model_name: str,
+                      device: str = "auto",
+                      normalize: bool = False) -> "Embeddings":
+    """Return a HuggingFace embeddings instance shared by all indexes.
+
+    Loading a model is slow and allocates its weights again, indexes using
+    the same model and device share one instance.
+    """
+    if device == "auto":
+        device = auto_device()
+    encode_kwargs = {"normalize_embeddings": True} if normalize else {}
+    return cls(model_name=model_name,
+               model_kwargs={"device": device},
+               encode_kwargs=encode_kwargs)
+
+
+def _wrap_cached(embedder: "Embeddings", model_name: str) -> "Embeddings":
+    """Wrap `embedder` with an on-disk cache of document embeddings.
+
+    Vectors are stored under `$XDG_CACHE_HOME/instrukt/embeddings/<model>/`
+    so re-indexing unchanged documents skips the model.
+    """
+    from langchain.embeddings import CacheBackedEmbeddings
+    from langchain.storage import LocalFileStore
+
+    from ..config import _xdg
+
+    # the file store only accepts `[a-zA-Z0-9_.-]` in keys
+    namespace = re.sub(r"[^a-zA-Z0-9_.-]", "_", model_name)
+    store = LocalFileStore(_xdg("cache", "instrukt", "embeddings", namespace))
+    return CacheBackedEmbeddings.from_bytes_store(embedder, store,
+                                                  namespace=namespace)
+
+
 class Embedding(NamedTuple):
     """Wrappers and helpers for an embedding function/model used in an index."""
     name: str
-    fn: t.Type["Embeddings"]
+    fn: str
+    """Embedding class as a `module:Class` path, imported on first use."""
     kwargs: t.Dict[str, t.Any]
+    normalized: bool = False
+    """The model outputs unit vectors, new indexes use inner product."""
+
+    @property
+    def cls(self) -> t.Type["Embeddings"]:
+        """The embedding class."""
+        emb_cls = _resolved.get(self.fn)
+        if emb_cls is None:
+            module, name = self.fn.split(":")
+            emb_cls = _resolved[self.fn] = getattr(import_module(module), name)
+        return emb_cls
+
+    def build(self, cached: bool = True) -> "Embeddings":
+        """Instantiate the embedding function.
 
+        Local (HuggingFace) models are loaded on the best available device
+        unless a device is set in the kwargs. With `cached`, document
+        embeddings are cached on disk.
+        """
+        kwargs = self.kwargs
+        encode_kwargs = kwargs.get("encode_kwargs", {})
+        if self.fn.partition(":")[2].startswith("HuggingFace") and \
+                set(kwargs) <= {"model_name", "encode_kwargs"} and \
+                set(encode_kwargs) <= {"normalize_embeddings"}:
+            # the model instance is shared by all indexes using it
+            embedder = get_hf_embeddings(
+                self.cls, kwargs["model_name"],
+                normalize=bool(encode_kwargs.get("normalize_embeddings")))
+        else:
+            if self.fn.partition(":")[2].startswith("HuggingFace"):
+                model_kwargs = kwargs.get("model_kwargs", {})
+                if "device" not in model_kwargs:
+                    kwargs = {**kwargs,
+                              "model_kwargs": {**model_kwargs,
+                                               "device": auto_device()}}
+            embedder = self.cls(**kwargs)
+        if not cached:
+            return embedder
+        model_name = (kwargs.get("model_name") or kwargs.get("model")
+                      or getattr(embedder, "model", None)
+                      or self.fn.partition(":")[2])
+        if self.normalized:
+            model_name += "-normalized"
+        return _wrap_cached(embedder, model_name)
+
+
+_NORMALIZE = MappingProxyType({"normalize_embeddings": True})
 
 #NOTE: sentence_transofmers progress bar is automatically displayed for logging
 # level INFO or DEBUG
-EMBEDDINGS: dict[str, Embedding] = {
+EMBEDDINGS: t.Mapping[str, Embedding] = MappingProxyType({
     "default":
-    Embedding("Sentence Transormers (xs)", HuggingFaceEmbeddings,
-              dict(model_name="sentence-transformers/all-MiniLM-L6-v2", )),
+    Embedding("Sentence Transormers (xs)",
+              "langchain.embeddings:HuggingFaceEmbeddings",
+              dict(model_name="sentence-transformers/all-MiniLM-L6-v2",
+                   encode_kwargs=_NORMALIZE),
+              normalized=True),
     "bge-base-en":
-    Embedding("BGE Base EN", HuggingFaceBgeEmbeddings,
-              dict(model_name="BAAI/bge-base-en",)), 
+    Embedding("BGE Base EN", "langchain.embeddings:HuggingFaceBgeEmbeddings",
+              dict(model_name="BAAI/bge-base-en", encode_kwargs=_NORMALIZE),
+              normalized=True),
     "bge-large-en":
-    Embedding("BGE Large EN", HuggingFaceBgeEmbeddings,
-              dict(model_name="BAAI/bge-large-en",)), 
+    Embedding("BGE Large EN", "langchain.embeddings:HuggingFaceBgeEmbeddings",
+              dict(model_name="BAAI/bge-large-en", encode_kwargs=_NORMALIZE),
+              normalized=True),
     "mpnet-base-v2":
-    Embedding("Sentence Transormers", HuggingFaceEmbeddings,
-              dict(model_name="sentence-transformers/all-mpnet-base-v2", )),
+    Embedding("Sentence Transormers",
+              "langchain.embeddings:HuggingFaceEmbeddings",
+              dict(model_name="sentence-transformers/all-mpnet-base-v2",
+                   encode_kwargs=_NORMALIZE),
+              normalized=True),
     "instructor":
-    Embedding("Instructor (base)", HuggingFaceInstructEmbeddings,
+    Embedding("Instructor (base)",
+              "langchain.embeddings:HuggingFaceInstructEmbeddings",
               dict(
                   #TODO: use instructor-large
-                  model_name="hkunlp/instructor-base", 
-                  )),
+                  model_name="hkunlp/instructor-base",
+                  encode_kwargs=_NORMALIZE,
+                  ),
+              normalized=True),
     "openai":
-    Embedding("OpenAI", OpenAIEmbeddings, dict()),
-              }
+    # openai embeddings are normalized to length 1
+    Embedding("OpenAI", "langchain.embeddings:OpenAIEmbeddings", dict(),
+              normalized=True),
+              })
+
+
+def find_embedding(cls: t.Type["Embeddings"], model_name: t.Optional[str],
+                   normalized: bool = False) -> Embedding:
+    """Return the embedding of a stored index from its class and model.
 
+    Models missing from `EMBEDDINGS` get an unnamed entry, so that restored
+    indexes are built like new ones.
+    """
+    if model_name is None:
+        raise ValueError(f"missing model name for {cls.__name__}")
+    for embedding in EMBEDDINGS.values():
+        if embedding.cls is cls and embedding.normalized == normalized and \
+                embedding.kwargs.get("model_name") == model_name:
+            return embedding
+    kwargs: t.Dict[str, t.Any] = {"model_name": model_name}
+    if normalized:
+        kwargs["encode_kwargs"] = _NORMALIZE
+    return Embedding(model_name, f"{cls.__module__}:{cls.__name__}", kwargs,
+                     normalized)
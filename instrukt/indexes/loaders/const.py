@@ -30,7 +30,7 @@ if t.TYPE_CHECKING:
 
 
 DEFAULT_EXCLUDES = [
-    ".*"
+    ".*",
     "**/.git*", ".git*", "__pycache__/**", "**/__pycache__/*"
 ]
 
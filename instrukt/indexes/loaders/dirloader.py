@@ -27,8 +27,11 @@ import concurrent
 import fnmatch
 import itertools
 import logging
-import time
+import os
+import re
 import typing as t
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 
 from langchain.document_loaders.blob_loaders.schema import Blob as LcBlob
@@ -41,12 +44,12 @@ from ...utils.debug import ExecutionTimer
 from .const import DEFAULT_EXCLUDES, DEFAULT_GLOBS
 from .schema import FileInfo, FileInfoMap, Source
 from .utils import (
-    batched,
     cpu_count,
-    detect_file_encodings,
+    detect_encodings_from_bytes,
     detect_filetype,
-    path_is_visible,
-    split_documents,
+    lang_name,
+    probe_documents,
+    split_lang_documents,
     splitter_for_file,
     src_by_lang,
 )
@@ -59,6 +62,44 @@ if t.TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# a compiled glob: one regex per path segment, None stands for `**`
+GlobParts = list["re.Pattern[str] | None"]
+
+
+def compile_glob(pattern: str) -> GlobParts:
+    """Compile a `pathlib` glob pattern to match relative paths by segments."""
+    return [
+        None if part == "**" else re.compile(fnmatch.translate(part))
+        for part in pattern.split("/") if part not in ("", ".")
+    ]
+
+
+@lru_cache(maxsize=32)
+def compile_excludes(globs: tuple[str, ...]) -> "re.Pattern[str] | None":
+    """Compile exclude globs into one regex, shared by loaders."""
+    if not globs:
+        return None
+    return re.compile("|".join(fnmatch.translate(glob) for glob in globs))
+
+
+def glob_match(parts: t.Sequence[str], pattern: GlobParts, i: int = 0,
+               j: int = 0) -> bool:
+    """Match the segments of a relative file path with a compiled glob.
+
+    Like with `Path.glob`, `**` matches zero or more directories.
+    """
+    while j < len(pattern):
+        part_re = pattern[j]
+        if part_re is None:
+            return any(
+                glob_match(parts, pattern, k, j + 1)
+                for k in range(i, len(parts)))
+        if i >= len(parts) or not part_re.match(parts[i]):
+            return False
+        i += 1
+        j += 1
+    return i == len(parts)
+
 
 class Blob(LcBlob):
     detect_encoding: bool = False
@@ -67,35 +108,37 @@ class Blob(LcBlob):
     def as_string(self) -> str:
         """Read data as a string."""
         if self.data is None and self.path:
+            path = Path(self.path)
             if not self.detect_encoding:
-                with open(str(self.path), "r", encoding=self.encoding) as f:
-                    text = f.read()
-                    return text
-            else:
-                text = ""
-                try:
-                    with open(str(self.path), "r",
-                              encoding=self.encoding) as f:
-                        text = f.read()
-                except UnicodeDecodeError:
-                    detected_encodings = detect_file_encodings(self.path)
-                    for encoding in detected_encodings:
-                        logger.debug(f"Trying encoding: {encoding.encoding}")
-                        try:
-                            with open(self.path,
-                                      encoding=encoding.encoding) as f:
-                                text = f.read()
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                return text
+                return path.read_text(encoding=self.encoding)
+            return self._decode(path.read_bytes())
         elif isinstance(self.data, bytes):
+            if self.detect_encoding:
+                return self._decode(self.data)
             return self.data.decode(self.encoding)
         elif isinstance(self.data, str):
             return self.data
         else:
             raise ValueError(f"Unable to get string for blob {self}")
 
+    def _decode(self, raw: bytes) -> str:
+        """Decode raw content, detecting its encoding if needed.
+
+        The content is read once and reused for the detection.
+        """
+        try:
+            return raw.decode(self.encoding)
+        except UnicodeDecodeError:
+            pass
+        for encoding in detect_encodings_from_bytes(raw,
+                                                    name=str(self.path)):
+            logger.debug(f"Trying encoding: {encoding.encoding}")
+            try:
+                return raw.decode(encoding.encoding)
+            except UnicodeDecodeError:
+                continue
+        return ""
+
 
 #TODO: handle custom loader_cls
 #TODO: language parser threshold
@@ -112,33 +155,65 @@ class AutoDirLoader:
     Args:
         path: Path to the directory to load.
         glob: Glob patterns to match files.
-        exclude: Glob patterns to exclude files.
+        exclude: Glob patterns to exclude files, relative to `path`.
         suffixes: File extensions to match.
     """
 
     def __init__(
         self,
         path: str,
-        glob: list[str] = [],
-        exclude: list[str] = [],
-        suffixes: list[str] = [],
+        glob: t.Iterable[str] = (),
+        exclude: t.Iterable[str] = (),
+        suffixes: t.Iterable[str] = (),
         load_hidden: bool = False,
         max_concurrency: int = 4,
-        mimetype_prefixes: list[str] = [],
+        mimetype_prefixes: t.Iterable[str] = (),
     ) -> None:
+        # pattern options are frozen to hashable tuples by their setters
         self.path = path
-        self.glob = glob
-        self.exclude = exclude
+        self.glob = glob  # compiled by the setter
+        self.exclude = exclude  # compiled to a single regex by the setter
         self.suffixes = suffixes
-        self.mimetype_prefixes = mimetype_prefixes
+        self.mimetype_prefixes = tuple(mimetype_prefixes)
         self.load_hidden = load_hidden
         self.max_concurrency = max_concurrency
         self._pbar: ProgressProtocol | None = None
+        self._paths_cache: list[Path] | None = None
+        self._paths_cache_key: tuple | None = None
 
         #default blob parser
         self._default_blob_parser: LanguageParser = LanguageParser(parser_threshold=100)
 
 
+    @property
+    def glob(self) -> tuple[str, ...]:
+        """Glob patterns to match files."""
+        return self._glob
+
+    @glob.setter
+    def glob(self, value: t.Iterable[str]):
+        self._glob = tuple(value)
+        self._glob_parts = [compile_glob(g) for g in self._glob]
+
+    @property
+    def exclude(self) -> tuple[str, ...]:
+        """Glob patterns to exclude files."""
+        return self._exclude
+
+    @exclude.setter
+    def exclude(self, value: t.Iterable[str]):
+        self._exclude = tuple(value)
+        self._exclude_re = compile_excludes(self._exclude)
+
+    @property
+    def suffixes(self) -> frozenset[str]:
+        """File extensions to match, case insensitive."""
+        return self._suffixes
+
+    @suffixes.setter
+    def suffixes(self, value: t.Iterable[str]):
+        self._suffixes = frozenset(s.lower() for s in value)
+
     @property
     def pbar(self) -> ProgressProtocol | None:
         """The textual progress bar."""
@@ -160,34 +235,53 @@ class AutoDirLoader:
 
         return self._default_blob_parser
 
+    #: number of files read ahead of the parser
+    PREFETCH = 8
+
+    @staticmethod
+    def _read_blob(path: Path) -> Blob:
+        blob = Blob.from_path(path)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            # leave the error to the parser, it is reported per file
+            return blob
+        return Blob(data=data, mimetype=blob.mimetype, encoding=blob.encoding,
+                    path=path)
+
     def yield_blobs(self) -> t.Iterable[Blob]:
-        """Yield blobs for matched paths."""
+        """Yield blobs for matched paths.
+
+        Files are read by a thread pool up to `PREFETCH` files ahead, so disk
+        reads overlap with parsing. Blobs are yielded in path order.
+        """
 
         def generate_blobs():
-            for path in self.yield_paths():
-                log.info(f"{path}")
-                yield Blob.from_path(path)
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, self.max_concurrency)) as executor:
+                pending: deque[concurrent.futures.Future] = deque()
+                paths = iter(self.yield_paths())
+                for path in itertools.islice(paths, self.PREFETCH):
+                    pending.append(executor.submit(self._read_blob, path))
+                while pending:
+                    blob = pending.popleft().result()
+                    path = next(paths, None)
+                    if path is not None:
+                        pending.append(executor.submit(self._read_blob, path))
+                    log.info(f"{blob.path}")
+                    yield blob
 
         return generate_blobs()
 
     def lazy_parse(self, blob: Blob) -> t.Iterator["Document"]:
         parser = self.get_blob_parser(blob)
 
-        def generate_docs():
-            for doc in parser.lazy_parse(blob):
-                if self.pbar is not None:
-                    self.pbar.update(1)
-                yield doc
-            if self.pbar is not None:
-                self.pbar.update_pbar(total=None)
-
-        return generate_docs()
+        return parser.lazy_parse(blob)
 
     def _lazy_load(self) -> t.Iterator["Document"]:
         """Lazy load and parse all files in a directory.
 
-        Args:
-            pbar: Textual progress bar to update
+        The progress bar advances once per file.
         """
 
         if self.pbar is not None:
@@ -202,6 +296,9 @@ class AutoDirLoader:
                 log.warning(f"Error decoding {blob.path}: {str(e)}")
             except Exception as e:
                 log.error(f"Error with {blob.path} occurred: {str(e)}")
+            finally:
+                if self.pbar is not None:
+                    self.pbar.update(1)
 
     def lazy_load(self):
         return self._lazy_load()
@@ -213,33 +310,77 @@ class AutoDirLoader:
         failed at the `load()` stage.
         """
         all_docs: list["Document"] = []
-
-        # duplicate the iterator for counting
-        _for_cnt, docs = itertools.tee(self.lazy_load(), 2)
-        doc_count = sum(1 for _ in _for_cnt)
         infomap: FileInfoMap = {}
 
-        time.sleep(0.1)
-        if self.pbar is not None:
-            self.pbar.update_msg("splitting documents ...")
-            self.pbar.update_pbar(total=doc_count, progress=0)
-
-        with ExecutionTimer(f"split {doc_count} documents"):
-
-            with concurrent.futures.ProcessPoolExecutor(
-                    max_workers=self.max_concurrency) as executor:
+        # the progress bar counts parsed files, then split batches once all
+        # files are parsed. Batches split meanwhile have their own counter
+        submitted = 0
+        split_done = 0
+        splitting = False
+
+        def collect(done: t.Iterable[concurrent.futures.Future]) -> None:
+            nonlocal split_done
+            for future in done:
+                all_docs.extend(future.result())
+                split_done += 1
+                if splitting and self.pbar is not None:
+                    self.pbar.update(1)
 
-                chunksize = 100  # Number of documents to process in each chunk
-                results = []
-                for batch in batched(docs, chunksize):
-                    results.append(executor.submit(split_documents, batch))
+        # documents are detected in this process and bucketed by language,
+        # each batch sent to the pool holds documents of a single language.
+        # Splitting starts while documents are being loaded, the number of
+        # batches in flight is bounded to cap memory usage
+        chunksize = 100  # Number of documents to process in each chunk
+        max_pending = 2 * self.max_concurrency
+        doc_count = 0
+        skipped: set[str] = set()
+        buckets: dict[str, list["Document"]] = {}
+        with ExecutionTimer("split documents"), \
+                concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_concurrency) as executor:
+            pending: set[concurrent.futures.Future] = set()
+
+            def submit(lang: str, batch: list["Document"]) -> None:
+                nonlocal pending, submitted
+                submitted += 1
+                if len(pending) >= max_pending:
+                    done, pending = concurrent.futures.wait(
+                        pending,
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(split_lang_documents, lang, batch))
+
+            for doc in self.lazy_load():
+                doc_count += 1
+                src = doc.metadata["source"]
+                info = infomap.get(src)
+                if info is None:
+                    if src in skipped:
+                        continue
+                    info = next((fi for _, fi in probe_documents(iter([doc]))),
+                                None)
+                    if info is None:
+                        skipped.add(src)
+                        continue
+                    infomap[src] = info
+                doc.metadata["language"] = info.lang
+                lang = lang_name(info.lang)
+                bucket = buckets.setdefault(lang, [])
+                bucket.append(doc)
+                if len(bucket) >= chunksize:
+                    submit(lang, bucket)
+                    buckets[lang] = []
+
+            for lang, bucket in buckets.items():
+                if bucket:
+                    submit(lang, bucket)
 
-                for future in concurrent.futures.as_completed(results):
-                    splitted, info = future.result()
-                    all_docs.extend(splitted)
-                    infomap.update(info)
-                    if self.pbar is not None:
-                        self.pbar.update(len(splitted))
+            if self.pbar is not None:
+                self.pbar.update_msg("splitting documents ...")
+                self.pbar.update_pbar(total=submitted, progress=split_done)
+            splitting = True
+            collect(concurrent.futures.as_completed(pending))
+        log.info(f"split {doc_count} documents")
 
         langs = src_by_lang(((k, v) for k, v in infomap.items()),
                             count_src=True)
@@ -250,29 +391,85 @@ class AutoDirLoader:
     def accepted_mimetypes(self):
         raise NotImplementedError
 
+    def _walk(self) -> t.Iterator[str]:
+        """Yield the paths of all files under `path`, relative to it.
+
+        The tree is walked once with `os.scandir`. Hidden entries are pruned
+        unless `load_hidden` is set. Like `**` in `Path.glob`, symlinks to
+        directories are not followed.
+        """
+        root = str(self.path)
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                entries = os.scandir(os.path.join(root, rel_dir))
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if not self.load_hidden and entry.name.startswith("."):
+                        continue
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(rel)
+                        elif entry.is_file():
+                            yield rel
+                    except OSError:
+                        continue
+
+    def _paths_key(self) -> tuple:
+        return (self.path, self.glob, self.exclude, self.suffixes,
+                self.load_hidden)
+
+    def clear_paths_cache(self) -> None:
+        """Forget the matched paths, the next scan walks the tree again."""
+        self._paths_cache = None
+        self._paths_cache_key = None
+
     def yield_paths(self) -> t.Iterator[Path]:
-        """Returns an iterator over the paths matching the glob pattern."""
+        """Returns an iterator over the paths matching the glob pattern.
+
+        The matched paths are cached after a complete scan and reused as long
+        as the loader options do not change.
+        """
+        key = self._paths_key()
+        if self._paths_cache is not None and self._paths_cache_key == key:
+            yield from self._paths_cache
+            return
+
         paths: list[Path] = []
-        for g in self.glob:
-            paths.extend(Path(self.path).glob(g))
-
-        for path in paths:
-            if self.exclude:
-                if any(
-                        fnmatch.fnmatch(str(path), glob)
-                        for glob in self.exclude):
-                    continue
-            if path.is_file():
-                if self.suffixes and path.suffix not in self.suffixes:
-                    continue
-                if not path_is_visible(path.relative_to(
-                        self.path)) and not self.load_hidden:
-                    continue
-                yield path
+        for path in self._scan_paths():
+            paths.append(path)
+            yield path
+        self._paths_cache, self._paths_cache_key = paths, key
+
+    def _scan_paths(self) -> t.Iterator[Path]:
+        root = Path(self.path)
+        globs = self._glob_parts
+        exclude_re = self._exclude_re
+        suffixes = self._suffixes
+        for rel in self._walk():
+            parts = rel.split("/")
+            if suffixes and \
+                    os.path.splitext(parts[-1])[1].lower() not in suffixes:
+                continue
+            if not any(glob_match(parts, g) for g in globs):
+                continue
+            # excludes are matched relative to the root, it may start with a dot
+            if exclude_re is not None and exclude_re.match(rel):
+                continue
+            yield root.joinpath(rel)
 
     def count_matching_paths(self) -> int:
-        """Lazy count files that match the pattern without loading to memory."""
-        return sum(1 for _ in self.yield_paths())
+        """Count the files that match the pattern."""
+        if self._paths_cache is None or \
+                self._paths_cache_key != self._paths_key():
+            for _ in self.yield_paths():
+                pass
+        assert self._paths_cache is not None
+        return len(self._paths_cache)
 
     def detect_files(self) -> t.Iterator[tuple[Source, FileInfo]]:
         """Detect metadata from a GenericLoader.
@@ -289,24 +486,31 @@ class AutoDirLoader:
         if self.pbar is not None:
             self.pbar.update_pbar(total=self.count_matching_paths(),
                                   progress=0)
-        for path in self.yield_paths():
-            if path.is_file():
-                try:
-                    filetype = detect_filetype(str(path))
-                    if filetype.mime is not None and not any(
-                            filetype.mime.startswith(prefix)
-                            for prefix in self.mimetype_prefixes):
-                        continue
-                    lang, splitter = splitter_for_file(filetype)
-                    fi = FileInfo(filetype.ext, filetype.mime,
-                                  filetype.encoding, lang, splitter)
+
+        # detection may open files with libmagic, paths are probed by a
+        # thread pool and yielded in path order
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, self.max_concurrency)) as executor:
+            results = executor.map(self._detect_path, self.yield_paths())
+            for path, fi in results:
+                if self.pbar is not None:
+                    self.pbar.update(1)
+                if fi is not None:
                     yield (str(path), fi)
-                except LoaderError:
-                    log.warning(f"Couldn't guess file type for <{path}>. skip")
-                finally:
-                    if self.pbar is not None:
-                        self.pbar.update(1)
 
+    def _detect_path(self, path: Path) -> tuple[Path, FileInfo | None]:
+        """Detect the file info of a path, None if the file is skipped."""
+        try:
+            filetype = detect_filetype(str(path))
+        except LoaderError:
+            log.warning(f"Couldn't guess file type for <{path}>. skip")
+            return path, None
+        if filetype.mime is not None and \
+                not filetype.mime.startswith(self.mimetype_prefixes):
+            return path, None
+        lang, splitter = splitter_for_file(filetype)
+        return path, FileInfo(filetype.ext, filetype.mime, filetype.encoding,
+                              lang, splitter)
 
 DIRECTORY_LOADER = (
     AutoDirLoader,
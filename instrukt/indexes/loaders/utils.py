@@ -20,12 +20,14 @@
 ##
 """Document loaders utils."""
 
-import concurrent
-import itertools
+import concurrent.futures
 import logging
 import mimetypes
 import os
+import threading
 import typing as t
+from collections import Counter, defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 import chardet
@@ -33,28 +35,73 @@ from langchain.text_splitter import Language, RecursiveCharacterTextSplitter
 
 from ...errors import LoaderError
 from .const import lang_map
-from .schema import FileEncoding, FileInfo, FileInfoMap, FileType, LangSplitter, Source
+from .schema import FileEncoding, FileInfo, FileType, LangSplitter, Source
 
 if t.TYPE_CHECKING:
-    from chardet.resultdict import ResultDict
     from langchain.document_loaders.base import BaseLoader
     from langchain.schema import Document
     from langchain.text_splitter import TextSplitter
 
 log = logging.getLogger(__name__)
 
+try:
+    import magic
+except ImportError:
+    magic = None
+
+_LANGUAGES = {v.value: v for v in Language}
+
+# load the mime types database once instead of on the first guess
+mimetypes.init()
+
 
 def path_is_visible(p: Path) -> bool:
-    return not any(part.startswith('.') for part in p.parts)
+    """Return False if any part of the path is hidden (starts with a dot)."""
+    s = str(p)
+    if s == ".":
+        return True
+    return not (s.startswith(".") or os.sep + "." in s)
+
+
+_encoding_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_encoding_executor_lock = threading.Lock()
+
+
+def _get_encoding_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Worker thread running the encoding detectors, created on first use."""
+    global _encoding_executor
+    with _encoding_executor_lock:
+        if _encoding_executor is None:
+            _encoding_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="enc-detect")
+        return _encoding_executor
 
 
-def batched(iterable: t.Iterable, n: int) -> t.Iterable:
-    """Yield batches from an iterable."""
-    if n < 1:
-        raise ValueError("batch size must be >= 1")
-    it = iter(iterable)
-    while batch := tuple(itertools.islice(it, n)):
-        yield batch
+def _reset_encoding_executor(
+        executor: concurrent.futures.ThreadPoolExecutor) -> None:
+    """Abandon an executor whose worker is stuck on a timed out detection.
+
+    The next detection starts a new worker instead of queuing behind it.
+    """
+    global _encoding_executor
+    with _encoding_executor_lock:
+        if _encoding_executor is executor:
+            _encoding_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _detect_encodings(rawdata: bytes) -> list[FileEncoding]:
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return [
+            FileEncoding(**enc) for enc in chardet.detect_all(rawdata)
+            if enc["encoding"] is not None
+        ]
+    return [
+        FileEncoding(m.encoding, 1.0 - m.chaos, m.language)
+        for m in from_bytes(rawdata)
+    ]
 
 
 def detect_file_encodings(file_path: str,
@@ -68,29 +115,50 @@ def detect_file_encodings(file_path: str,
         file_path: The path to the file to detect the encoding for.
         timeout: The timeout in seconds for the encoding detection.
     """
+    rawdata = Path(file_path).read_bytes()
+    return detect_encodings_from_bytes(rawdata, timeout, file_path)
 
-    def read_and_detect(file_path: str) -> list["ResultDict"]:
-        with open(file_path, "rb") as f:
-            rawdata = f.read()
-        return chardet.detect_all(rawdata)
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(read_and_detect, file_path)
-        try:
-            encodings = future.result(timeout=timeout)
-        except concurrent.futures.TimeoutError:
-            raise TimeoutError(
-                f"Timeout reached while detecting encoding for {file_path}")
+def detect_encodings_from_bytes(rawdata: bytes,
+                                timeout: int = 5,
+                                name: str = "<bytes>") -> list[FileEncoding]:
+    """Try to detect the encoding of raw file content.
 
-    if all(encoding["encoding"] is None for encoding in encodings):
-        raise RuntimeError(f"Could not detect encoding for {file_path}")
-    return [
-        FileEncoding(**enc) for enc in encodings if enc["encoding"] is not None
-    ]
+    UTF-8 (and ASCII) content is recognized without running a detector. Other
+    encodings are detected with `charset_normalizer` when available, falling
+    back to `chardet`.
 
+    Args:
+        rawdata: The content to detect the encoding for.
+        timeout: The timeout in seconds for the encoding detection.
+        name: The content name used in errors.
+    """
+    try:
+        rawdata.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    else:
+        return [FileEncoding("utf-8", 1.0, None)]
+
+    executor = _get_encoding_executor()
+    future = executor.submit(_detect_encodings, rawdata)
+    try:
+        encodings = future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        _reset_encoding_executor(executor)
+        raise TimeoutError(
+            f"Timeout reached while detecting encoding for {name}")
 
+    if len(encodings) == 0:
+        raise RuntimeError(f"Could not detect encoding for {name}")
+    return encodings
+
+
+@lru_cache(maxsize=256)
 def splitter_for_file(ft: FileType) -> LangSplitter:
-    """Returns (lang, splitter) for the given file extension"""
+    """Returns (lang, splitter) for the given file extension
+
+    Results are cached by file type, files of the same type share them."""
     lang: str | None = ""
     ext = ft.ext
     if ext is not None:
@@ -101,34 +169,43 @@ def splitter_for_file(ft: FileType) -> LangSplitter:
     elif ext is None and ft.mime is not None and ft.mime.startswith("text/"):
         lang = "text"
 
-    if lang in list(v.value for v in Language):
-        return LangSplitter(
-            lang, RecursiveCharacterTextSplitter.from_language(Language(lang)))
-    elif lang is not None:
-        return LangSplitter(lang, RecursiveCharacterTextSplitter())
-    else:
-        return LangSplitter("text", RecursiveCharacterTextSplitter())
+    if lang is None:
+        lang = "text"
+    return LangSplitter(lang, _splitter_for_lang(lang))
+
+
+@lru_cache(maxsize=64)
+def _splitter_for_lang(lang: str) -> "TextSplitter":
+    """Return the shared splitter for a language."""
+    language = _LANGUAGES.get(lang)
+    if language is not None:
+        return RecursiveCharacterTextSplitter.from_language(language)
+    return RecursiveCharacterTextSplitter()
 
 
+@lru_cache(maxsize=4096)
 def detect_filetype(path_str: str,
                     raise_err=True,
                     autodecode=False) -> FileType:
     """Returns the file extension of the given path.
 
     If the file does not have an extension, it tries to detect the file type and returns
-    the corresponding extension."""
+    the corresponding extension.
+
+    Results are cached by path, the same files are probed several times while
+    loading a directory."""
     path = Path(path_str)
     ext: str | None = path.suffix.lower()
 
     # first try to guess mime
     mime, encoding = mimetypes.guess_type(path_str)
 
+    # the language of known extensions is enough, no need to open the file
+    if mime is None and ext in lang_map:
+        return FileType(f"text/x-{lang_map[ext]}", ext, encoding)
+
     if mime is None:
-        try:
-            import magic
-        except ImportError:
-            raise LoaderError("magic library is required to detect file type")
-        mime = magic.from_file(path_str, mime=True)
+        mime = _magic_mime(path_str)
 
     if ext == "":
         ext = mimetypes.guess_extension(mime, )
@@ -142,28 +219,44 @@ def detect_filetype(path_str: str,
     return FileType(mime, ext, encoding)
 
 
+@lru_cache(maxsize=1)
+def _get_magic() -> "magic.Magic":
+    """Shared libmagic handle for mime detection, opened on first use."""
+    if magic is None:
+        raise LoaderError("magic library is required to detect file type")
+    return magic.Magic(mime=True)
+
+
+def _magic_mime(path_str: str) -> str:
+    """Detect the mime type of a file from its content with libmagic."""
+    return _get_magic().from_file(path_str)
+
+
 def src_by_lang(files: t.Iterator[tuple[Source, FileInfo]],
                 count_src: bool = False) -> dict[str, list[str]]:
-    """Aggregate document sources by language."""
-    srcs_by_lang: dict[str, list[str]] = {}
+    """Aggregate document sources by language.
+
+    With `count_src` the number of sources per language is returned instead,
+    without building the lists of sources."""
+    if count_src:
+        counts: Counter[str] = Counter()
+        for _, info in files:
+            assert info.lang is not None
+            counts[info.lang] += 1
+        return dict(counts)  # type: ignore
+
+    srcs_by_lang: defaultdict[str, list[str]] = defaultdict(list)
     for src, info in files:
         assert info.lang is not None
-        lang = info.lang
-        if lang in srcs_by_lang:
-            srcs_by_lang[lang].append(src)
-        else:
-            srcs_by_lang[lang] = [src]
-    if count_src:
-        srcs_by_lang = {lang: len(srcs) for lang, srcs in srcs_by_lang.items()}
-    return srcs_by_lang
+        srcs_by_lang[info.lang].append(src)
+    return dict(srcs_by_lang)
 
 
 def probe_documents(
         docs: t.Iterator["Document"]) -> t.Iterator[tuple[Source, FileInfo]]:
-    """Detects various doc metadata for a given iterator of Document."""
-    # every language will share the same splitter
-    lang_to_splitter: dict[str, "TextSplitter"] = {}
+    """Detects various doc metadata for a given iterator of Document.
 
+    Splitters are shared by language through `_splitter_for_lang`."""
     src_seen: set[str] = set()
 
     for d in docs:
@@ -179,12 +272,7 @@ def probe_documents(
                                 d.metadata.get("content_type"))
         if all((_lang, _content_type)) and isinstance(_lang, Language):
             mime, ext, enc = detect_filetype(src, raise_err=False)
-            if _lang in lang_to_splitter:
-                splitter = lang_to_splitter[_lang]
-            else:
-                splitter = RecursiveCharacterTextSplitter.from_language(_lang)
-                lang_to_splitter[_lang] = splitter
-
+            splitter = _splitter_for_lang(_lang.value)
             yield src, FileInfo(ext, mime, enc, _lang, splitter=splitter)
             continue
 
@@ -202,46 +290,22 @@ def probe_documents(
             log.warning(f"Couldn't find file type for {src}: skipping...\n{e}")
             continue
         else:
-            # reuse the same splitter object
-            if lang in lang_to_splitter:
-                splitter = lang_to_splitter[lang]
-            else:
-                lang_to_splitter[lang] = splitter
-
             yield src, FileInfo(ft.ext, ft.mime, ft.encoding, lang, splitter)
 
 
-def split_documents(
-        docs: list["Document"]) -> tuple[list["Document"], FileInfoMap]:
-    """Split documents with the appropriate splitter.
+def split_lang_documents(lang: str,
+                         docs: t.Sequence["Document"]) -> list["Document"]:
+    """Split documents of the same language.
 
-    This will be called in a process pool executor and should be picklable and not
-    rely on any global state or shared memory.
+    Runs in a process pool: the splitter is rebuilt from the language name
+    once per worker instead of being pickled with every batch.
     """
-    splitted_docs: list["Document"] = []
-    splitter_to_docs: dict["TextSplitter", list["Document"]] = {}
+    return _splitter_for_lang(lang).split_documents(docs)
 
-    _docs, _probed_docs = itertools.tee(docs, 2)
-    infomap: FileInfoMap = {
-        src: info
-        for src, info in probe_documents(_probed_docs)
-    }
 
-    for doc in _docs:
-        src = doc.metadata["source"]
-        assert src is not None
-        if infomap.get(src) is None:
-            log.warning(f"Skipping {src} as it has no file info")
-            continue
-        doc.metadata["language"] = infomap[src].lang
-        splitter = infomap[src].splitter
-        assert splitter is not None
-        splitter_to_docs.setdefault(splitter, []).append(doc)
-
-    for splitter, to_split in splitter_to_docs.items():
-        splitted_docs.extend(splitter.split_documents(to_split))
-
-    return splitted_docs, infomap
+def lang_name(lang: "str | Language") -> str:
+    """Language name usable with `split_lang_documents`."""
+    return lang.value if isinstance(lang, Language) else lang
 
 
 def get_loader(path: str) -> t.Optional["BaseLoader"]:
@@ -274,9 +338,16 @@ def get_loader(path: str) -> t.Optional["BaseLoader"]:
     return None
 
 
-def cpu_count():
-    """Return the number of CPUs in the system."""
-    try:
-        return abs((os.cpu_count() or 0) - 2)
-    except Exception:
-        return 1
+def cpu_count() -> int:
+    """Return the number of worker processes to use, leaving two CPUs free.
+
+    Only the CPUs usable by this process are counted, always returns at
+    least 1.
+    """
+    if hasattr(os, "process_cpu_count"):
+        n = os.process_cpu_count()
+    elif hasattr(os, "sched_getaffinity"):
+        n = len(os.sched_getaffinity(0))
+    else:
+        n = os.cpu_count()
+    return max(1, (n or 1) - 2)
@@ -23,6 +23,8 @@
 import contextvars
 import importlib
 import logging
+import threading
+import time
 import typing as t
 import uuid
 
@@ -41,6 +43,7 @@ from ..config import APP_SETTINGS, ChromaSettings
 from ..context import context_var
 from ..errors import IndexError
 from ..indexes.chroma import ChromaWrapper
+from ..indexes.embeddings import EMBEDDINGS, find_embedding
 from ..indexes.loaders import get_loader
 from ..indexes.schema import Collection, EmbeddingDetails, Index
 from .loaders import LOADER_MAPPINGS, AutoDirLoader
@@ -60,6 +63,11 @@ class IndexManager(BaseModel):
     _client: chromadb.Client = PrivateAttr()
     _index: ChromaWrapper = PrivateAttr()
     _indexes: dict[str, ChromaWrapper] = PrivateAttr()
+    _cols_cache: tuple[float, list[Collection]] | None = PrivateAttr(None)
+    _cols_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    #: how long the result of `list_collections` is reused, in seconds
+    COLLECTIONS_TTL: t.ClassVar[float] = 2.0
 
     class Config:
         arbitrary_types_allowed = True
@@ -81,7 +89,8 @@ class IndexManager(BaseModel):
 
             # if collection is already stored, restore its embedding_fn
             embedding_inst: TEmbeddings | None = None
-            if collection_name in [c.name for c in self.list_collections()]:
+            if any(c.name == collection_name
+                   for c in self.list_collections()):
                 embedding = self.get_embedding_fn(collection_name)
                 embedding_fn_cls = self.get_embedding_fn_cls(
                     embedding.embedding_fn_cls)
@@ -92,8 +101,11 @@ class IndexManager(BaseModel):
                         HuggingFaceInstructEmbeddings,
                         HuggingFaceBgeEmbeddings
                     )):
-                    embedding_inst = embedding_fn_cls(
-                        model_name=embedding.model_name)
+                    # same embedding path as new indexes, with the cache
+                    embedding_inst = find_embedding(
+                        embedding_fn_cls,
+                        embedding.model_name,
+                        embedding.normalized).build()
                 # use default embedding's model name (ie OpenAI ..)
 
                 # handle openai
@@ -106,7 +118,7 @@ class IndexManager(BaseModel):
                             "OpenAI API key required.")
                         return None
                     else:
-                        embedding_inst = embedding_fn_cls()  # type: ignore
+                        embedding_inst = EMBEDDINGS["openai"].build()
 
                 else:
                     raise ValueError(
@@ -182,10 +194,17 @@ class IndexManager(BaseModel):
 
         log.debug(f"chroma kwargs: {self.chroma_kwargs})")
 
+        # cosine similarity of unit vectors is their inner product
+        hnsw_metadata = self.chroma_settings.hnsw_metadata()
+        if EMBEDDINGS[index.embedding].normalized and \
+                hnsw_metadata["hnsw:space"] == "cosine":
+            hnsw_metadata["hnsw:space"] = "ip"
+
         new_index = ChromaWrapper(self._client,
                                   collection_name=index.name,
                                   loading=False,
                                   collection_metadata={
+                                      **hnsw_metadata,
                                       'description': index.description,
                                   },
                                   **self.chroma_kwargs)
@@ -200,6 +219,7 @@ class IndexManager(BaseModel):
             new_index.add_documents(docs)
 
         self._indexes[index.name] = new_index
+        self.invalidate_collections()
 
         return new_index
 
@@ -210,13 +230,28 @@ class IndexManager(BaseModel):
         index = self._indexes[name]
         await index.adelete_collection()
         del self._indexes[name]
+        self.invalidate_collections()
 
     def list_collections(self) -> t.Sequence[Collection]:
-        """List the available index collections."""
-        client = chromadb.Client(self.chroma_settings)
+        """List the available index collections.
 
+        The UI polls this method, the result is reused for `COLLECTIONS_TTL`
+        seconds.
+        """
         #NOTE: this is the offcial API. It's slow because it checks embedding fn
-        return client.list_collections()
+        with self._cols_lock:
+            cached = self._cols_cache
+            if cached is not None and \
+                    time.monotonic() - cached[0] < self.COLLECTIONS_TTL:
+                return cached[1]
+            collections = list(self._client.list_collections())
+            self._cols_cache = (time.monotonic(), collections)
+            return collections
+
+    def invalidate_collections(self) -> None:
+        """Drop the cached collection list."""
+        with self._cols_lock:
+            self._cols_cache = None
 
     def get_embedding_fn(self, col_name: str) -> EmbeddingDetails:
         """Get embedding function as fully qualified class name for the collection.
@@ -261,7 +296,8 @@ class IndexManager(BaseModel):
                         error="[b yellow]missing openai api key ![/]")
 
             model_name = metadata.get("model_name")
-            return EmbeddingDetails(embedding_fn, model_name, extra_info)
+            return EmbeddingDetails(embedding_fn, model_name, extra_info,
+                                    metadata.get("hnsw:space") == "ip")
         except IndexError:
             raise IndexError(f"No metadata found for collection {col_name}")
 
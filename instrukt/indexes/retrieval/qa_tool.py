@@ -31,7 +31,7 @@ from langchain.prompts.chat import (
     SystemMessagePromptTemplate,
 )
 
-from ...config import APP_SETTINGS
+from ...config import APP_SETTINGS, ensure_llm_cache
 from ...errors import ToolError
 from ...tools.base import Tool
 from .utils import make_description
@@ -95,6 +95,7 @@ def retrieval_tool_from_index(index: "ChromaWrapper",
     """
 
     if llm is None:
+        ensure_llm_cache()
         llm = ChatOpenAI(**APP_SETTINGS.openai.dict())
         #TODO!: document changing retrieval param using input `r:gptx` with auto complete
         # llm.model_name="gpt-4"
@@ -44,6 +44,8 @@ class EmbeddingDetails(NamedTuple):
     model_name: str | None = None
     extra: dict[str, t.Any] = {}
     """extra information about this embedding"""
+    normalized: bool = False
+    """the index stores normalized embeddings and uses inner product"""
 
     @property
     def fn_short(self) -> str:
@@ -130,5 +132,4 @@ class Index(BaseModel):
     @property
     def embedding_fn(self) -> Embeddings:
         """Get the embedding function"""
-        embedding = EMBEDDINGS[self.embedding]
-        return embedding.fn(**embedding.kwargs)
+        return EMBEDDINGS[self.embedding].build()
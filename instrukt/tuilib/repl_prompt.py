@@ -174,7 +174,7 @@ class REPLPrompt(Input, InstruktDomNodeMixin, ExternalProcessMixin):
             self.cmd_history.add(msg)
             return CmdMsg("help")
         if msg == "%debug":
-            import_module("instrukt.commands.debug")
+            import_module("instrukt.commands.debug").init_debug()
             self._write_main_buffer(LogMessage.info("Debug mode activated."))
             return CmdMsg("debug")
         elif msg[0] in CMD_PREFIX:
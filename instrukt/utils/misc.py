@@ -20,6 +20,8 @@
 ##
 """Various utility functions."""
 
+import sys
+from importlib import import_module
 from typing import Any
 
 
@@ -39,3 +41,18 @@ def _version() -> str:
     return pkg_resources.get_distribution("instrukt").version
 
 
+_import_cache: dict[tuple[str, str], Any] = {}
+
+def cached_import(module_path: str, attr: str) -> Any:
+    """Return `attr` from `module_path`, resolving it only once.
+
+    Replaces function level imports on hot paths, which go through the
+    import system on every call.
+    """
+    key = (module_path, attr)
+    try:
+        return _import_cache[key]
+    except KeyError:
+        module = sys.modules.get(module_path) or import_module(module_path)
+        value = _import_cache[key] = getattr(module, attr)
+        return value
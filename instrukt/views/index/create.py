@@ -168,12 +168,12 @@ class CreateIndex(VerticalScroll,
 
     def get_embeddings(self):
         for k, v in EMBEDDINGS.items():
-            if issubclass(v.fn, HuggingFaceEmbeddings):
+            if issubclass(v.cls, HuggingFaceEmbeddings):
                 # get model name, try to split by `/` and get the last element
                 model_name = v.kwargs["model_name"].split("/")[-1]
                 assert model_name, "model name is empty"
                 yield (f"{v.name}: {model_name}", k)
-            elif issubclass(v.fn, OpenAIEmbeddings):
+            elif issubclass(v.cls, OpenAIEmbeddings):
                 model_field = OpenAIEmbeddings.__fields__.get("model")
                 assert model_field is not None
                 yield (f"{v.name}: {model_field.default}", k)
@@ -0,0 +1,53 @@
+import asyncio
+import hashlib
+
+import chromadb
+import pytest
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+
+from instrukt.indexes.chroma import ChromaWrapper
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic embeddings derived from the text hash."""
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [b / 255 for b in digest[:8]]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+@pytest.fixture
+def index():
+    client = chromadb.EphemeralClient()
+    yield ChromaWrapper(client, "test", loading=False,
+                        embedding_function=HashEmbeddings())
+    client.delete_collection("test")
+
+
+def test_add_documents_ids(index):
+    docs = [Document(page_content=f"doc{i}") for i in range(3)]
+    ids = ["a", "b", "c"]
+    assert index.add_documents(docs, ids=ids) == ids
+    index.add_documents(docs, ids=ids)
+    assert index.count == 3
+
+
+@pytest.mark.asyncio
+async def test_search_during_queued_delete(index):
+    docs = [Document(page_content=f"doc{i}") for i in range(3)]
+    index.add_documents(docs, ids=["a", "b", "c"])
+    index.DELETE_BATCH_WINDOW = 0.2
+
+    delete = asyncio.create_task(index.adelete(ids=["a"]))
+    await asyncio.sleep(0.05)
+    # the delete is held by the batch window, the search sees the document
+    before = index.similarity_search_with_score("doc0", k=3)
+    assert "doc0" in [doc.page_content for doc, _ in before]
+
+    await delete
+    after = index.similarity_search_with_score("doc0", k=3)
+    assert "doc0" not in [doc.page_content for doc, _ in after]
@@ -1,27 +1,26 @@
-import pytest
+import sys
 from unittest import mock
-from instrukt.commands.command import (
-        CmdGroup,
-        Command,
-        CallbackOutput,
-        CmdLog,
-        )
 
-from instrukt.commands.history import CommandHistory
+import pytest
 
+from instrukt.commands.command import (
+    CallbackOutput,
+    CmdGroup,
+    CmdLog,
+    Command,
+)
+from instrukt.commands.history import CommandHistory
+from instrukt.commands.root_cmd import ROOT
 from instrukt.context import Context
-
-
 from instrukt.errors import (
-        CommandNotFound,
-        CommandGroupError,
-        CommandError,
-        CommandHandlerError,
-        CommandAlreadyRegistered,
-        NoCommandsRegistered,
-        InvalidArguments
-        )
-
+    CommandAlreadyRegistered,
+    CommandError,
+    CommandGroupError,
+    CommandHandlerError,
+    CommandNotFound,
+    InvalidArguments,
+    NoCommandsRegistered,
+)
 
 
 @pytest.fixture
@@ -164,6 +163,39 @@ class TestGroup:
 
         assert group.get_command("cmd1_alias") == cmd
 
+    def test_command_alias_collision(self, group):
+
+        def cmd1(ctx):
+            pass
+
+        def cmd2(ctx):
+            pass
+
+        group.add_command(Command("cmd1", cmd1, description="test", alias="c"))
+        with pytest.raises(CommandAlreadyRegistered):
+            group.add_command(Command("cmd2", cmd2, description="test", alias="c"))
+
+        # overriding a command drops its previous alias
+        cmd = Command("cmd1", cmd1, description="test", alias="c1")
+        group.add_command(cmd, override=True)
+        assert group.get_command("c") is None
+        assert group.get_command("c1") == cmd
+
+    def test_help_updated_on_add_command(self, group):
+
+        def cmd1(ctx):
+            pass
+
+        sub_group = CmdGroup("sub_group", "sub group")
+        assert sub_group.help().startswith("[b]Root commands")
+        assert group.help().find("sub_group") == -1
+
+        group.add_command(sub_group)
+        sub_group.add_command(Command("cmd1", cmd1, description="test"))
+        assert group.help().find("sub_group") != -1
+        assert sub_group.help().startswith("Commands under sub_group")
+        assert sub_group.help().find("cmd1") != -1
+
     def test_walk_command_tree(self, group):
         """walks all commands from the roo command
 
@@ -265,6 +297,13 @@ class TestGroup:
 
         assert len(list(group.walk_commands())) == 7
 
+        # parsing
+        assert group.parse_cmd("sub_group2 sub_sub_group") == sub_sub_group
+        assert group.parse_cmd("sub_group2 ") == sub_group2
+        assert group.parse_cmd("sub_group cmd2") == cmd2
+        assert group.parse_cmd("cmd1 x") is None
+        assert group.parse_cmd("non_existing") is None
+
         # executions
         # print(group.execute(ctx))
         with pytest.raises(CommandNotFound):
@@ -435,6 +474,16 @@ class TestCommandHistory:
         assert history.get_match("find").entry == "find this command"
         assert history.get_match("non existing") == ""
 
+    def test_get_match_evicted(self):
+        history = CommandHistory(max_size=2)
+        history.add("find old")
+        history.add("find new")
+        assert history.get_match("find").entry == "find new"
+        history.add("cmd3")
+        history.add("cmd4")
+        assert history.get_match("find") == ""
+        assert history.get_match("cmd").entry == "cmd4"
+
     #test save/load
     def test_save(self, history, config):
         history.config = config
@@ -485,3 +534,11 @@ class _TestCommandHistory:
         history.add("cmd3")
         assert history.get_match("find") == "find this command"
         assert history.get_match("non existing") == ""
+
+
+class TestRootCommands:
+
+    def test_lazy_command_modules(self):
+        assert ROOT.get_command("quit") is not None
+        assert "instrukt.commands.ui" in sys.modules
+        assert ROOT.get_command("not_a_command") is None
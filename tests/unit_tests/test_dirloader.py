@@ -0,0 +1,30 @@
+import os
+
+from instrukt.indexes.loaders.const import DEFAULT_EXCLUDES, DEFAULT_GLOBS
+from instrukt.indexes.loaders.dirloader import AutoDirLoader
+
+
+def make_tree(root):
+    for rel in ("a.py", "docs/b.md", "pkg/__pycache__/c.pyc", ".git/HEAD",
+                "pkg/.gitignore", "pkg/d.txt"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("test")
+
+
+def test_default_excludes(tmp_path):
+    make_tree(tmp_path)
+    loader = AutoDirLoader(str(tmp_path), glob=DEFAULT_GLOBS,
+                           exclude=DEFAULT_EXCLUDES)
+    found = sorted(p.relative_to(tmp_path).as_posix()
+                   for p in loader.yield_paths())
+    assert found == ["a.py", "docs/b.md", "pkg/d.txt"]
+
+
+def test_excludes_relative_root(tmp_path, monkeypatch):
+    make_tree(tmp_path / "proj")
+    (tmp_path / "cwd").mkdir()
+    monkeypatch.chdir(tmp_path / "cwd")
+    root = os.path.join("..", "proj")
+    loader = AutoDirLoader(root, glob=DEFAULT_GLOBS, exclude=DEFAULT_EXCLUDES)
+    assert loader.count_matching_paths() == 3
@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from instrukt.indexes.loaders import utils
+from instrukt.indexes.loaders.schema import FileEncoding
+
+LATIN1 = "café".encode("latin-1")
+
+
+def test_detect_encodings_utf8():
+    encodings = utils.detect_encodings_from_bytes("café".encode())
+    assert encodings[0].encoding == "utf-8"
+
+
+def test_detect_encodings_after_timeout(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def detect(rawdata):
+        calls.append(rawdata)
+        if len(calls) == 1:
+            # the first detection hangs past its timeout
+            release.wait(5)
+        return [FileEncoding("latin-1", 1.0, None)]
+
+    monkeypatch.setattr(utils, "_detect_encodings", detect)
+    try:
+        with pytest.raises(TimeoutError):
+            utils.detect_encodings_from_bytes(LATIN1, timeout=0.1)
+        # a fast detection does not wait behind the stuck one
+        encodings = utils.detect_encodings_from_bytes(LATIN1, timeout=1)
+        assert encodings[0].encoding == "latin-1"
+    finally:
+        release.set()